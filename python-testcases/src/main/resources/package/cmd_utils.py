@@ -0,0 +1,126 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Runs a list of independent shell commands on a node as one
+            bash script in a single exec, and splits the output back into
+            the stdout, stderr and exit code of each command.
+"""
+import base64
+import uuid
+from package_utils import MODEL_CHANGE_CMD_REGEX, PKG_CHANGE_CMD_REGEX, \
+    PLAN_CMD_REGEX, PackageInventoryMixin
+
+
+def get_pipeline_script(cmds, marker):
+    """
+    Description:
+        Get a bash script running commands one after the other. Each one
+        runs in a sub shell with no stdin, so an exit or a cd does not
+        affect the next one, and its stderr is kept in a temporary file.
+        Everything is printed to stdout between marker lines so it reads
+        the same whether or not the exec merges stdout and stderr.
+    Args:
+        cmds (list): Commands to run.
+        marker (str): Token, not found in the output of the commands,
+                      which starts every marker line.
+    Returns:
+        str. The script.
+    """
+    lines = ["err_file=$(/bin/mktemp)"]
+    for index, cmd in enumerate(cmds):
+        lines.extend([
+            "echo '{0} {1} out'".format(marker, index),
+            "( {0} ) < /dev/null 2> \"$err_file\"; rc=$?".format(cmd),
+            "echo; echo '{0} {1} err'".format(marker, index),
+            "/bin/cat \"$err_file\"",
+            "echo; echo \"{0} {1} rc $rc\"".format(marker, index)])
+    lines.append("/bin/rm -f \"$err_file\"")
+    return "\n".join(lines)
+
+
+def get_pipeline_cmd(cmds, marker):
+    """ Get the single command running a pipeline script with bash. """
+    script = base64.b64encode(
+        get_pipeline_script(cmds, marker).encode("utf-8")).decode("ascii")
+    return "/bin/bash -c \"$(echo {0} | /usr/bin/base64 -d)\"".format(script)
+
+
+def parse_pipeline_output(out, marker):
+    """
+    Description:
+        Split the output of a pipeline script back into the result of each
+        command.
+    Args:
+        out (list): Output lines of the script.
+        marker (str): Token used in get_pipeline_script().
+    Returns:
+        list. (stdout, stderr, rc) tuple of each command that completed.
+    """
+    results = []
+    section = None
+    lines = {}
+    for line in out:
+        fields = line.rstrip("\r").split(" ")
+        if fields[0] != marker:
+            if section is not None:
+                lines[section].append(line.rstrip("\r"))
+            continue
+
+        section = fields[2]
+        lines[section] = []
+        if section == "rc":
+            # Drop the line break added after each part of the output.
+            std = [lines[part][:-1] if lines[part][-1:] == [""]
+                   else lines[part] for part in ("out", "err")]
+            results.append((std[0], std[1], int(fields[3])))
+            section = None
+    return results
+
+
+def run_pipelined(test, node, cmds, su_root=False, **kwargs):
+    """
+    Description:
+        Run consecutive independent commands on a node in a single exec,
+        and a single su if run as root, rather than one of each per
+        command. Every command runs even if an earlier one fails.
+
+        Commands that change the LITP model must not be pipelined, the
+        framework registers their cleanup from the command of each
+        run_command() call. The package inventory of a test using
+        PackageInventoryMixin is invalidated here from the plain commands,
+        as the mixin only sees the encoded script.
+    Args:
+        test (GenericTest): The running test.
+        node (str): Filename of the node.
+        cmds (list): Commands to run, in order.
+        su_root (bool): If True run the commands as root.
+        kwargs: Other arguments of run_command(), such as su_timeout_secs.
+    Returns:
+        list. (stdout, stderr, rc) tuple of each command, like the result
+              of run_command().
+    """
+    model_cmds = [cmd for cmd in cmds if MODEL_CHANGE_CMD_REGEX.search(cmd)]
+    test.assertEqual([], model_cmds,
+                     "LITP model changes cannot be pipelined")
+    marker = "@@pipeline-{0}@@".format(uuid.uuid4().hex)
+    kwargs.setdefault("add_to_cleanup", False)
+    try:
+        out, err, ret_code = test.run_command(
+            node, get_pipeline_cmd(cmds, marker), su_root=su_root, **kwargs)
+    finally:
+        if isinstance(test, PackageInventoryMixin):
+            if any(PLAN_CMD_REGEX.search(cmd) for cmd in cmds):
+                test.pkg_inventory.invalidate()
+            elif any(PKG_CHANGE_CMD_REGEX.search(cmd) for cmd in cmds):
+                test.pkg_inventory.invalidate(node)
+    results = parse_pipeline_output(out, marker)
+    test.assertEqual(len(cmds), len(results),
+                     "Pipeline stopped on {0} with rc {1}: {2}"
+                     .format(node, ret_code, err))
+    return results
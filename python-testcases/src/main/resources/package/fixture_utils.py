@@ -0,0 +1,243 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Copies the local ISO fixture directories to the MS as a tar
+            archive built in memory and unpacked by a single command. The
+            copy is skipped when the MS already holds one with the same
+            content hash.
+"""
+import base64
+import hashlib
+import io
+import os
+import tarfile
+import threading
+
+READ_CHUNK_SIZE = 1024 * 1024
+# Largest base64 archive sent within a single command. A single argument
+# of an exec is limited to 128KiB on Linux, the command must stay below.
+MAX_INLINE_ARCHIVE = 96 * 1024
+
+# Base64 encoded archives built by get_fixture_archive(), by tree hash.
+_ARCHIVES = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_tree_hash(path):
+    """
+    Description:
+        Get a hash of the content of a directory tree: the relative path,
+        mode and data of every file and the target of every symlink.
+    Args:
+        path (str): Local directory.
+    Returns:
+        str. Hex sha256 digest.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(dirs + files):
+            full_path = os.path.join(root, name)
+            rel_path = os.path.relpath(full_path, path)
+            digest.update(rel_path.encode("utf-8") + b"\0")
+            if os.path.islink(full_path):
+                digest.update(b"l" + os.readlink(full_path).encode("utf-8"))
+            elif os.path.isfile(full_path):
+                digest.update("f{0:o}".format(
+                    os.stat(full_path).st_mode & 0o777).encode("utf-8"))
+                with open(full_path, "rb") as data:
+                    for chunk in iter(lambda: data.read(READ_CHUNK_SIZE),
+                                      b""):
+                        digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_manifest_checksum(path):
+    """
+    Description:
+        Get the checksum of the file manifest of a directory: the sha256
+        of the 'sha256sum' line of every file, sorted by path. It matches
+        the output of get_manifest_checksum_cmd() for an unpacked copy.
+    Args:
+        path (str): Local directory.
+    Returns:
+        str. Hex sha256 digest.
+    """
+    path = os.path.normpath(path)
+    parent = os.path.dirname(path)
+    lines = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            full_path = os.path.join(root, name)
+            if os.path.islink(full_path):
+                continue
+            file_digest = hashlib.sha256()
+            with open(full_path, "rb") as data:
+                for chunk in iter(lambda: data.read(READ_CHUNK_SIZE), b""):
+                    file_digest.update(chunk)
+            lines.append((os.path.relpath(full_path, parent),
+                          file_digest.hexdigest()))
+    manifest = "".join("{0}  {1}\n".format(digest, rel_path)
+                       for rel_path, digest in sorted(lines))
+    return hashlib.sha256(manifest.encode("utf-8")).hexdigest()
+
+
+def get_manifest_checksum_cmd(remote_parent, name):
+    """ Get a command printing the manifest checksum of a copy on a node. """
+    return ("cd {0} && /bin/find {1} -type f -print0 | LC_ALL=C /bin/sort -z "
+            "| /usr/bin/xargs -0 /usr/bin/sha256sum | /usr/bin/sha256sum | "
+            "/bin/cut -d' ' -f1".format(remote_parent, name))
+
+
+def iter_tar_gz(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Description:
+        Generate a gzipped tar archive of a directory in memory, yielding
+        the data as it is produced rather than writing a temporary file.
+    Args:
+        path (str): Local directory.
+        chunk_size (int): Amount of archive data to buffer between yields.
+    Returns:
+        generator. Chunks of archive data.
+    """
+    path = os.path.normpath(path)
+    name = os.path.basename(path)
+    buf = io.BytesIO()
+    tar = tarfile.open(fileobj=buf, mode="w|gz")
+    try:
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for entry in [root] + [os.path.join(root, file_name)
+                                   for file_name in sorted(files)]:
+                tar.add(entry, arcname=os.path.normpath(os.path.join(
+                    name, os.path.relpath(entry, path))), recursive=False)
+                if buf.tell() >= chunk_size:
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+    finally:
+        tar.close()
+    yield buf.getvalue()
+
+
+def get_fixture_archive(path, tree_hash=None):
+    """
+    Description:
+        Get a gzipped tar archive of a directory, base64 encoded, built in
+        memory on first use and kept for the rest of the session. Archives
+        are keyed by the hash of the directory content so a changed
+        fixture gets a new archive.
+    Args:
+        path (str): Local directory.
+        tree_hash (str): Hash of the directory, computed if not given.
+    Returns:
+        str. The encoded archive.
+    """
+    tree_hash = tree_hash or get_tree_hash(path)
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(tree_hash)
+    if archive is None:
+        archive = base64.b64encode(b"".join(iter_tar_gz(path))).decode(
+            "ascii")
+        with _ARCHIVES_LOCK:
+            _ARCHIVES[tree_hash] = archive
+    return archive
+
+
+def get_archive_upload(archive, remote_parent, name):
+    """
+    Description:
+        Get how to send an encoded archive to a node. An archive of up to
+        MAX_INLINE_ARCHIVE is decoded straight into the unpacking command.
+        A bigger one is first appended to a file on the node in chunks of
+        that size, each by a command of its own.
+    Args:
+        archive (str): Base64 encoded archive.
+        remote_parent (str): Directory the archive is unpacked into.
+        name (str): Name of the fixture.
+    Returns:
+        tuple. (commands, source): the commands to run first, and the
+        command printing the archive data for the unpacking command.
+    """
+    if len(archive) <= MAX_INLINE_ARCHIVE:
+        return [], "echo {0} | /usr/bin/base64 -d".format(archive)
+
+    upload = os.path.join(remote_parent, ".{0}.tar.gz.b64".format(name))
+    cmds = ["/bin/mkdir -p {0} && /bin/rm -f {1}".format(remote_parent,
+                                                         upload)]
+    for start in range(0, len(archive), MAX_INLINE_ARCHIVE):
+        cmds.append("echo {0} >> {1}".format(
+            archive[start:start + MAX_INLINE_ARCHIVE], upload))
+    return cmds, "( /usr/bin/base64 -d {0} && /bin/rm -f {0} )".format(
+        upload)
+
+
+def get_hash_marker_path(remote_parent, name):
+    """ Get the file recording the hash of an unpacked fixture on a node. """
+    return os.path.join(remote_parent, ".{0}.sha256".format(name))
+
+
+def stage_fixture_dir(test, node, local_dir, remote_parent, as_root=True):
+    """
+    Description:
+        Make a copy of a local fixture directory available on a node. The
+        transfer is skipped if the node already holds an unpacked copy of
+        the same content. Otherwise an archive of the directory, built in
+        memory, is unpacked on the node by a single command and checked
+        against the manifest checksum of the local directory.
+    Args:
+        test (GenericTest): The running test.
+        node (str): Filename of the node.
+        local_dir (str): Local fixture directory.
+        remote_parent (str): Directory to unpack the fixture into. It is
+                             removed with its content after the test.
+        as_root (bool): If True copy and unpack as root.
+    Returns:
+        str. Path of the fixture directory on the node.
+    """
+    local_dir = os.path.normpath(local_dir)
+    name = os.path.basename(local_dir)
+    remote_dir = os.path.join(remote_parent, name)
+    marker = get_hash_marker_path(remote_parent, name)
+    tree_hash = get_tree_hash(local_dir)
+    test.del_file_after_run(node, remote_parent)
+
+    out, _, _ = test.run_command(
+        node, "[ -d {0} ] && /bin/cat {1}".format(remote_dir, marker),
+        su_root=as_root)
+    if out == [tree_hash]:
+        test.log("info", "{0} already on {1}, not copied".format(name, node))
+        return remote_dir
+
+    # The archive is piped straight into tar on the node, within the
+    # command itself, so nothing is written to disk on either side. The
+    # copy is unpacked quietly and checked against the manifest checksum
+    # instead of pulling back a listing of every file. The marker is only
+    # written for a good copy.
+    archive = get_fixture_archive(local_dir, tree_hash)
+    manifest_checksum = get_manifest_checksum(local_dir)
+    upload_cmds, source = get_archive_upload(archive, remote_parent, name)
+    for cmd in upload_cmds:
+        test.run_command(node, cmd, su_root=as_root, default_asserts=True)
+    out, err, _ = test.run_command(
+        node,
+        "/bin/rm -rf {dir} {marker} && /bin/mkdir -p {parent} && "
+        "{source} | /bin/tar xmz --directory={parent} && "
+        "checksum=$({checksum_cmd}) && echo $checksum && "
+        "[ \"$checksum\" = \"{manifest}\" ] && echo {hash} > {marker}"
+        .format(dir=remote_dir, marker=marker, parent=remote_parent,
+                source=source,
+                checksum_cmd=get_manifest_checksum_cmd(remote_parent, name),
+                manifest=manifest_checksum, hash=tree_hash),
+        su_root=as_root)
+    test.assertEqual([manifest_checksum], out,
+                     "Copy of {0} on {1} does not match: {2}"
+                     .format(name, node, err))
+    return remote_dir
@@ -0,0 +1,248 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   LogCursor, which reads a log file on a node from the byte
+            offset of its previous read, across a log rotation, and waits
+            for lines matching expected or failure patterns.
+"""
+import re
+import time
+import test_constants
+
+# Printed right after the log data, on the same line as a partially written
+# last line or on a line of its own if the data ends with a newline.
+END_MARKER = "__LOG_CURSOR_END__"
+
+
+def _compile(pattern):
+    """ Compile a text or regex pattern, plain text is matched literally. """
+    if hasattr(pattern, "search"):
+        return pattern
+    return re.compile(re.escape(pattern))
+
+
+class LogMatch(object):
+    """ Where and when a pattern was found by LogCursor.wait_for_all(). """
+
+    def __init__(self, pattern, offset, line):
+        self.pattern = pattern
+        self.offset = offset
+        self.line = line
+        self.time = time.time()
+
+    def __str__(self):
+        return "'{0}' at byte {1}".format(
+            getattr(self.pattern, "pattern", self.pattern), self.offset)
+
+
+class LogMatchResult(object):
+    """ Outcome of LogCursor.wait_for_all(). """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        # LogMatch keyed by expected pattern.
+        self.found = {}
+        # LogMatch of the failure pattern that was found, if any.
+        self.failure = None
+
+    @property
+    def missing(self):
+        """ The expected patterns which have not been found. """
+        return [pattern for pattern in self.patterns
+                if pattern not in self.found]
+
+    @property
+    def success(self):
+        """ True if all patterns were found and no failure was logged. """
+        return self.failure is None and not self.missing
+
+    def __str__(self):
+        lines = ["found {0}".format(self.found[pattern])
+                 for pattern in self.patterns if pattern in self.found]
+        lines.extend("missing '{0}'".format(
+            getattr(pattern, "pattern", pattern))
+            for pattern in self.missing)
+        if self.failure is not None:
+            lines.append("failure {0}".format(self.failure))
+        return "\n".join(lines)
+
+
+class LogCursor(object):
+    """
+    Reads a log file on a node from the byte offset reached by the previous
+    read, so each byte of the log is only transferred once. The lines read
+    are kept so they can be matched again without another remote read.
+
+    If the log has been rotated since the previous read, the rest of the
+    rotated file is read before the new log.
+    """
+
+    def __init__(self, test, node, log_path=None, rotated_log_path=None):
+        """
+        Args:
+            test (GenericTest): The running test.
+            node (str): Filename of the node holding the log.
+            log_path (str): Log file, the system log by default.
+            rotated_log_path (str): Name the log is rotated to, the first
+                                    rotated system log by default.
+        """
+        self.test = test
+        self.node = node
+        self.log_path = log_path or test_constants.GEN_SYSTEM_LOG_PATH
+        self.rotated_log_path = (rotated_log_path or
+                                 test_constants.LOGROTATED_SYSLOG_FILE1)
+        # (offset, line) of every complete line read so far. The offset is
+        # the number of bytes read by the cursor before the line.
+        self.lines = []
+        self.bytes_read = 0
+        self._partial_line = ""
+        self.inode, self.offset = self._stat()
+
+    def _run(self, cmd):
+        """ Run a command as root on the node holding the log. """
+        out, _, _ = self.test.run_command(self.node, cmd, su_root=True)
+        return out
+
+    def _stat(self):
+        """ Get the inode and size of the log. """
+        out = self._run("/usr/bin/stat -c '%i %s' {0}".format(self.log_path))
+        self.test.assertNotEqual([], out)
+        inode, size = out[0].split()
+        return inode, int(size)
+
+    def _get_read_cmd(self):
+        """
+        Get a command which prints the inode and size of the log followed
+        by the data appended since the last read and by END_MARKER.
+        """
+        return ("set -- $(/usr/bin/stat -c '%i %s' {log}); echo \"$1 $2\"; "
+                "if [ \"$1\" = \"{inode}\" ] && [ \"$2\" -ge {offset} ]; "
+                "then /usr/bin/tail -c +{start} {log} | "
+                "/usr/bin/head -c $(($2 - {offset})); "
+                "else if [ \"$(/usr/bin/stat -c %i {rotated} 2>/dev/null)\" "
+                "= \"{inode}\" ]; then /usr/bin/tail -c +{start} {rotated}; "
+                "fi; /usr/bin/head -c $2 {log}; fi; echo {marker}"
+                .format(log=self.log_path, rotated=self.rotated_log_path,
+                        inode=self.inode, offset=self.offset,
+                        start=self.offset + 1, marker=END_MARKER))
+
+    def read(self):
+        """
+        Description:
+            Read the lines appended to the log since the previous read.
+        Returns:
+            list. The new complete lines.
+        """
+        out = self._run(self._get_read_cmd())
+        if len(out) < 2 or not out[-1].endswith(END_MARKER):
+            self.test.log("info", "Could not read {0} on {1}"
+                          .format(self.log_path, self.node))
+            return []
+
+        self.inode, size = out[0].split()
+        self.offset = int(size)
+        data = out[1:]
+        partial_line = data.pop()[:-len(END_MARKER)]
+
+        new_lines = []
+        for line in data:
+            line = self._partial_line + line
+            self._partial_line = ""
+            new_lines.append((self.bytes_read, line))
+            self.bytes_read += len(line) + 1
+        self._partial_line += partial_line
+
+        self.lines.extend(new_lines)
+        return [line for _, line in new_lines]
+
+    def find(self, pattern, read=True):
+        """
+        Description:
+            Find the lines read by the cursor which match a pattern.
+        Args:
+            pattern (str or compiled regex): Text or regular expression to
+                                             look for.
+            read (bool): If True read new log data before matching.
+        Returns:
+            list. The matching lines.
+        """
+        if read:
+            self.read()
+        if hasattr(pattern, "search"):
+            return [line for _, line in self.lines if pattern.search(line)]
+        return [line for _, line in self.lines if pattern in line]
+
+    def wait_for(self, pattern, timeout_secs=120, interval_secs=2):
+        """
+        Description:
+            Wait until a line matching a pattern is logged. Only the new
+            log data is read on every poll.
+        Args:
+            pattern (str or compiled regex): Text or regular expression to
+                                             wait for.
+            timeout_secs (int): Time to wait.
+            interval_secs (int): Time between reads.
+        Returns:
+            list. The matching lines, empty if the timeout expired.
+        """
+        deadline = time.time() + timeout_secs
+        found = self.find(pattern)
+        while not found and time.time() < deadline:
+            time.sleep(interval_secs)
+            found = self.find(pattern)
+        return found
+
+    def wait_for_all(self, patterns, failure_patterns=None,
+                     timeout_secs=120, interval_secs=2):
+        """
+        Description:
+            Wait until every pattern has been logged or until one failure
+            pattern is logged. The log is scanned once: all patterns are
+            combined into a single regular expression and only lines which
+            match it are checked against the individual patterns.
+        Args:
+            patterns (list): Texts or compiled regexes to wait for.
+            failure_patterns (list): Texts or compiled regexes which end the
+                                     wait as soon as one is logged.
+            timeout_secs (int): Time to wait.
+            interval_secs (int): Time between reads.
+        Returns:
+            LogMatchResult. The patterns found, with byte offset and time,
+            the missing patterns and the failure found, if any.
+        """
+        result = LogMatchResult(patterns)
+        failure_patterns = failure_patterns or []
+        compiled = [(pattern, _compile(pattern), False)
+                    for pattern in patterns]
+        compiled.extend((pattern, _compile(pattern), True)
+                        for pattern in failure_patterns)
+        if not compiled:
+            return result
+        combined = re.compile("|".join("(?:{0})".format(regex.pattern)
+                                       for _, regex, _ in compiled))
+
+        deadline = time.time() + timeout_secs
+        next_line = 0
+        while True:
+            self.read()
+            for offset, line in self.lines[next_line:]:
+                if not combined.search(line):
+                    continue
+                for pattern, regex, is_failure in compiled:
+                    if pattern in result.found or not regex.search(line):
+                        continue
+                    if is_failure:
+                        result.failure = LogMatch(pattern, offset, line)
+                        return result
+                    result.found[pattern] = LogMatch(pattern, offset, line)
+            next_line = len(self.lines)
+
+            if not result.missing or time.time() >= deadline:
+                return result
+            time.sleep(interval_secs)
@@ -0,0 +1,191 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Agent run on the MS and the nodes to answer a batch of state
+            queries in a single SSH round trip. It only uses the standard
+            library of the system python.
+
+            It reads a JSON list of queries on stdin, for example:
+                [{"query": "path_exists", "path": "/etc/hosts"},
+                 {"query": "pkgs_installed", "packages": ["zsh"]}]
+            and prints one JSON list holding, in the same order, a result
+            {"ok": true, "value": ...} or {"ok": false, "error": "..."}
+            for each query. See node_utils.query_node().
+"""
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+UPTIME_PATH = "/proc/uptime"
+YUM_REPOS_GLOB = "/etc/yum.repos.d/*.repo"
+# State directories of puppet 4 and later and of puppet 3.
+PUPPET_STATE_DIRS = ("/opt/puppetlabs/puppet/cache/state",
+                     "/var/lib/puppet/state")
+PUPPET_RUN_LOCK = "agent_catalog_run.lock"
+PUPPET_RUN_SUMMARY = "last_run_summary.yaml"
+
+
+def run(cmd):
+    """ Run a command, return its exit code and its stdout lines. """
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    out = proc.communicate()[0].decode("utf-8", "replace")
+    return proc.returncode, out.splitlines()
+
+
+def read_first_line(path):
+    """ Read the first line of a file without the line break. """
+    with open(path) as data:
+        return data.readline().strip()
+
+
+def path_exists(path):
+    """ Check if a path exists. """
+    return os.path.exists(path)
+
+
+def pkgs_installed(packages):
+    """ Check which packages are installed, keyed by package. """
+    return dict((package, run(["/bin/rpm", "-q", package])[0] == 0)
+                for package in packages)
+
+
+def service_status(service):
+    """ Get the systemd state of a service, 'active' if it runs. """
+    out = run(["/usr/bin/systemctl", "is-active", service])[1]
+    return out[0] if out else "unknown"
+
+
+def uptime():
+    """ Get the seconds since the host booted. """
+    return float(read_first_line(UPTIME_PATH).split()[0])
+
+
+def boot_id():
+    """ Get the boot id, it changes every time the host boots. """
+    return read_first_line(BOOT_ID_PATH)
+
+
+def yum_repos():
+    """ Get the names of the repositories in /etc/yum.repos.d. """
+    return sorted(os.path.basename(path)[:-len(".repo")]
+                  for path in glob.glob(YUM_REPOS_GLOB))
+
+
+def get_boot_time():
+    """ Get the time, in seconds since the epoch, the host booted at. """
+    return time.time() - uptime()
+
+
+def get_service_start(service, boot_time):
+    """ Get the time a service last became active, None if it is not. """
+    _, out = run(["/usr/bin/systemctl", "show", service,
+                  "-p", "ActiveState", "-p", "ActiveEnterTimestampMonotonic"])
+    props = dict(line.split("=", 1) for line in out if "=" in line)
+    if props.get("ActiveState") != "active":
+        return None
+    # The monotonic clock counts microseconds since boot.
+    return boot_time + int(props["ActiveEnterTimestampMonotonic"]) / 1e6
+
+
+def read_run_summary(path):
+    """ Get the end time and duration of the run in a puppet summary. """
+    with open(path) as data:
+        summary = data.read()
+    last_run = re.search(r"^\s+last_run:\s+(\d+)", summary, re.M)
+    total = re.search(r"^\s+total:\s+([\d.]+)", summary, re.M)
+    if last_run is None:
+        return None, None
+    return (float(last_run.group(1)),
+            float(total.group(1)) if total is not None else None)
+
+
+def puppet_run(service="puppet", timeout_secs=600, interval=0.2,
+               until="catalog_end"):
+    """
+    Watch the puppet agent of the current boot until the until event,
+    by default the completion of a catalog run. Return the times, in
+    seconds since the epoch, at which the service became active, the
+    catalog run started and it completed, any of them None if not seen,
+    and the time the watch ended at.
+    """
+    boot_time = get_boot_time()
+    deadline = time.time() + timeout_secs
+    events = {"service_start": None, "catalog_start": None,
+              "catalog_end": None}
+    if until not in events:
+        raise ValueError("unknown event {0}".format(until))
+    while events[until] is None and time.time() < deadline:
+        if events["service_start"] is None:
+            events["service_start"] = get_service_start(service, boot_time)
+        for state_dir in PUPPET_STATE_DIRS:
+            lock = os.path.join(state_dir, PUPPET_RUN_LOCK)
+            summary = os.path.join(state_dir, PUPPET_RUN_SUMMARY)
+            # The lock is created when a catalog run starts.
+            if events["catalog_start"] is None and os.path.exists(lock):
+                started = os.stat(lock).st_mtime
+                if started >= boot_time:
+                    events["catalog_start"] = started
+            # The summary is written when a catalog run completes, its
+            # modification time is more precise than the whole seconds of
+            # last_run.
+            if not os.path.exists(summary):
+                continue
+            written = os.stat(summary).st_mtime
+            if written < boot_time:
+                continue
+            last_run, total = read_run_summary(summary)
+            if last_run is not None and last_run >= int(boot_time):
+                events["catalog_end"] = written
+                if events["catalog_start"] is None and total is not None:
+                    events["catalog_start"] = written - total
+        if events[until] is None:
+            time.sleep(interval)
+    events["now"] = time.time()
+    return events
+
+
+QUERIES = {
+    "path_exists": path_exists,
+    "pkgs_installed": pkgs_installed,
+    "service_status": service_status,
+    "uptime": uptime,
+    "boot_id": boot_id,
+    "yum_repos": yum_repos,
+    "puppet_run": puppet_run,
+}
+
+
+def answer(query):
+    """ Answer a single query, reporting a failure instead of raising. """
+    query = dict(query)
+    func = QUERIES.get(query.pop("query", None))
+    if func is None:
+        return {"ok": False, "error": "unknown query"}
+    try:
+        return {"ok": True, "value": func(**query)}
+    except Exception as err:  # pylint: disable=broad-except
+        return {"ok": False, "error": "{0}: {1}".format(
+            type(err).__name__, err)}
+
+
+def main():
+    """ Answer the queries read on stdin. """
+    queries = json.load(sys.stdin)
+    json.dump([answer(query) for query in queries], sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
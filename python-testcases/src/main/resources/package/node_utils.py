@@ -0,0 +1,471 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Reboot detection from the kernel boot id and probes of the
+            SSH port, reconnection of the framework to rebooted nodes, and
+            the client side of node_agent.py.
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import socket
+import threading
+import time
+from package_utils import run_on_nodes, format_node_errors
+
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+SSH_PORT = 22
+
+AGENT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "node_agent.py")
+AGENT_MISSING = "NODE_AGENT_MISSING"
+# Nodes the agent was pushed to in this session, by remote script path.
+_AGENT_PUSHED = set()
+_AGENT_LOCK = threading.Lock()
+
+
+def is_port_open(host, port=SSH_PORT, timeout=3):
+    """
+    Description:
+        Check if a TCP connection can be opened to a host.
+    Args:
+        host (str): Host name or IP address.
+        port (int): TCP port.
+        timeout (int): Connect timeout in seconds.
+    Returns:
+        bool. True if the connection was accepted.
+    """
+    try:
+        sock = socket.create_connection((host, port), timeout)
+    except (socket.error, socket.timeout):
+        return False
+    sock.close()
+    return True
+
+
+def read_boot_id(test, node):
+    """
+    Description:
+        Read the boot id of a node, it changes every time a node boots.
+    Args:
+        test (GenericTest): The running test.
+        node (str): Node filename.
+    Returns:
+        str. The boot id.
+    """
+    out, _, _ = test.run_command(node, "/bin/cat {0}".format(BOOT_ID_PATH),
+                                 default_asserts=True)
+    test.assertNotEqual([], out)
+    return out[0].strip()
+
+
+def get_boot_ids(test, nodes):
+    """
+    Description:
+        Read the boot id of every node, all nodes at the same time.
+    Args:
+        test (GenericTest): The running test.
+        nodes (list): Node filenames.
+    Returns:
+        dict. Boot id keyed by node.
+    """
+    boot_ids, errors = run_on_nodes(lambda node: read_boot_id(test, node),
+                                    nodes)
+    test.assertEqual({}, errors, format_node_errors(errors))
+    return boot_ids
+
+
+def get_backoff_delay(interval, jitter=0.5):
+    """
+    Description:
+        Get a random delay around a backoff interval, so watchers started
+        together do not retry in step.
+    Args:
+        interval (float): Backoff interval in seconds.
+        jitter (float): Fraction of the interval the delay may differ by.
+    Returns:
+        float. Delay in seconds.
+    """
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+class NodeReadiness(object):
+    """
+    Future set once a node answers over SSH again, or once its watcher
+    gives up, see NodeConnectionPool.reconnect().
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.start = time.time()
+        self.ready_at = None
+        self.attempts = 0
+        self._done = threading.Event()
+
+    def set_ready(self):
+        """ Record that the node is ready and wake up the waiters. """
+        self.ready_at = time.time()
+        self._done.set()
+
+    def give_up(self):
+        """ Record that the node did not come back and wake up waiters. """
+        self._done.set()
+
+    def is_ready(self):
+        """ True once the node answered over SSH. """
+        return self.ready_at is not None
+
+    def wait(self, timeout_secs=None):
+        """ Wait for the watcher of the node, return True if it is ready. """
+        self._done.wait(timeout_secs)
+        return self.is_ready()
+
+    def __str__(self):
+        if not self.is_ready():
+            return "{0}: not ready after {1} attempts".format(
+                self.node, self.attempts)
+        return "{0}: ready after {1:.1f}s and {2} attempts".format(
+            self.node, self.ready_at - self.start, self.attempts)
+
+
+class NodeConnectionPool(object):
+    """
+    Reconnects the framework's SSH connections to nodes which reboot.
+
+    Every node is watched by its own thread: its SSH port is probed with
+    jittered exponential backoff, which fails fast while the node is down,
+    and only an open port is followed by an SSH command. SSH calls of
+    different nodes run at the same time; the framework can only drop all
+    of its connections at once, so a stale connection is reset while no
+    other SSH call is running.
+    """
+
+    def __init__(self, test, min_interval=1, max_interval=16):
+        self.test = test
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._readiness = {}
+        self._idle = threading.Condition(threading.Lock())
+        self._active_calls = 0
+        self._resetting = False
+
+    def call(self, node, func, *args, **kwargs):
+        """
+        Description:
+            Run an SSH call for a node. If it fails all connections are
+            reset so that the next call to the node connects again.
+        Args:
+            node (str): Node filename, for logging.
+            func (callable): Function making the SSH call.
+        Returns:
+            tuple. (succeeded, value returned by func or None).
+        """
+        self._idle.acquire()
+        try:
+            while self._resetting:
+                self._idle.wait()
+            self._active_calls += 1
+        finally:
+            self._idle.release()
+
+        try:
+            value = func(*args, **kwargs)
+        except Exception:  # pylint: disable=broad-except
+            self.test.log("info", "{0} is not up at the moment".format(node))
+            self._end_call()
+            self.reset()
+            return False, None
+        self._end_call()
+        return True, value
+
+    def _end_call(self):
+        """ Record the end of an SSH call. """
+        self._idle.acquire()
+        try:
+            self._active_calls -= 1
+            self._idle.notify_all()
+        finally:
+            self._idle.release()
+
+    def reset(self):
+        """ Drop all connections once no other SSH call is running. """
+        self._idle.acquire()
+        try:
+            while self._resetting or self._active_calls:
+                self._idle.wait()
+            self._resetting = True
+        finally:
+            self._idle.release()
+
+        try:
+            self.test.disconnect_all_nodes()
+        finally:
+            self._idle.acquire()
+            try:
+                self._resetting = False
+                self._idle.notify_all()
+            finally:
+                self._idle.release()
+
+    def readiness(self, node):
+        """ Get the readiness future of a node, None if not reconnecting. """
+        return self._readiness.get(node)
+
+    def reconnect(self, nodes, timeout_secs=600):
+        """
+        Description:
+            Drop the connections to nodes which went or are going down and
+            reconnect to all of them at the same time, in the background.
+        Args:
+            nodes (list): Node filenames.
+            timeout_secs (int): Time to keep trying for each node.
+        Returns:
+            dict. NodeReadiness future keyed by node.
+        """
+        self.reset()
+        deadline = time.time() + timeout_secs
+        futures = {}
+        for node in nodes:
+            readiness = NodeReadiness(node)
+            self._readiness[node] = readiness
+            futures[node] = readiness
+            thread = threading.Thread(target=self._connect,
+                                      args=(readiness, deadline))
+            thread.daemon = True
+            thread.start()
+        return futures
+
+    def _connect(self, readiness, deadline):
+        """ Probe a node until it answers over SSH or time runs out. """
+        host = self.test.get_node_att(readiness.node, "ipv4")
+        interval = self.min_interval
+        while time.time() < deadline:
+            readiness.attempts += 1
+            if is_port_open(host):
+                succeeded, result = self.call(
+                    readiness.node, self.test.run_command, readiness.node,
+                    "/bin/true")
+                if succeeded and result[2] == 0:
+                    readiness.set_ready()
+                    return
+                if succeeded:
+                    self.reset()
+            time.sleep(get_backoff_delay(interval))
+            interval = min(interval * 2, self.max_interval)
+        readiness.give_up()
+
+    def wait_ready(self, nodes, timeout_secs=None):
+        """
+        Description:
+            Wait for nodes being reconnected to answer over SSH.
+        Args:
+            nodes (list): Node filenames passed to reconnect().
+            timeout_secs (int): Longest wait, all the reconnect time if None.
+        Returns:
+            bool. True if every node is ready.
+        """
+        deadline = None if timeout_secs is None \
+            else time.time() + timeout_secs
+        ready = True
+        for node in nodes:
+            remaining = None if deadline is None \
+                else max(0, deadline - time.time())
+            readiness = self._readiness[node]
+            if not readiness.wait(remaining):
+                ready = False
+            self.test.log("info", str(readiness))
+        return ready
+
+
+class RebootTimeline(object):
+    """
+    Times, in seconds since the epoch, at which a node was seen going down,
+    accepting SSH connections again and running with a new boot id.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.start = time.time()
+        self.went_down = None
+        self.ssh_back = None
+        self.boot_id_changed = None
+
+    @property
+    def rebooted(self):
+        """ True once the node runs with a new boot id. """
+        return self.boot_id_changed is not None
+
+    def __str__(self):
+        def since_start(event):
+            """ Format the time of an event relative to the start. """
+            if event is None:
+                return "-"
+            return "+{0:.1f}s".format(event - self.start)
+
+        return ("{0}: went down {1}, SSH back {2}, boot_id changed {3}"
+                .format(self.node, since_start(self.went_down),
+                        since_start(self.ssh_back),
+                        since_start(self.boot_id_changed)))
+
+
+def wait_for_reboot(test, nodes, boot_ids, timeout_secs=400,
+                    min_interval=1, max_interval=8, pool=None):
+    """
+    Description:
+        Watch nodes until they run with a boot id different to the one
+        recorded before the reboot. Every node is watched at the same time
+        by probing its SSH port with jittered exponential backoff; the
+        backoff is reset each time the node changes from up to down or
+        back. The connection to each node is live again on return.
+    Args:
+        test (GenericTest): The running test.
+        nodes (list): Node filenames.
+        boot_ids (dict): Boot id of each node before the reboot, as
+                         returned by get_boot_ids().
+        timeout_secs (int): Time to wait for all nodes.
+        min_interval (int): First delay between probes, in seconds.
+        max_interval (int): Longest delay between probes, in seconds.
+        pool (NodeConnectionPool): Pool making the SSH reads, a new one
+                                   if None.
+    Returns:
+        dict. RebootTimeline keyed by node.
+    """
+    deadline = time.time() + timeout_secs
+    pool = pool or NodeConnectionPool(test)
+
+    def watch(node):
+        """ Follow a node until its boot id changes or time runs out. """
+        timeline = RebootTimeline(node)
+        host = test.get_node_att(node, "ipv4")
+        interval = min_interval
+        while time.time() < deadline:
+            port_open = is_port_open(host)
+            now = time.time()
+            if not port_open and timeline.went_down is None:
+                timeline.went_down = now
+                interval = min_interval
+            elif port_open and timeline.went_down is not None \
+                    and timeline.ssh_back is None:
+                timeline.ssh_back = now
+                interval = min_interval
+
+            if port_open:
+                _, boot_id = pool.call(node, read_boot_id, test, node)
+                if boot_id is not None and boot_id != boot_ids[node]:
+                    timeline.boot_id_changed = time.time()
+                    if timeline.ssh_back is None:
+                        timeline.ssh_back = timeline.boot_id_changed
+                    break
+
+            time.sleep(get_backoff_delay(interval))
+            interval = min(interval * 2, max_interval)
+
+        test.log("info", str(timeline))
+        return timeline
+
+    timelines, errors = run_on_nodes(watch, nodes)
+    test.assertEqual({}, errors, format_node_errors(errors))
+    return timelines
+
+
+def get_agent_path():
+    """
+    Description:
+        Get the path of the agent script on a node. The directory is named
+        after the content of the script so a changed agent is pushed again.
+    Returns:
+        str. Remote path of node_agent.py.
+    """
+    with open(AGENT_SCRIPT, "rb") as data:
+        digest = hashlib.sha256(data.read()).hexdigest()
+    return "/tmp/litp_node_agent_{0}/{1}".format(
+        digest[:12], os.path.basename(AGENT_SCRIPT))
+
+
+def push_agent(test, node):
+    """
+    Description:
+        Copy the agent script to a node. It is left in place for the rest
+        of the session.
+    Args:
+        test (GenericTest): The running test.
+        node (str): Node filename.
+    Returns:
+        str. Remote path of the agent script.
+    """
+    agent_path = get_agent_path()
+    agent_dir = os.path.dirname(agent_path)
+    test.run_command(node, "/bin/mkdir -p {0}".format(agent_dir),
+                     default_asserts=True)
+    test.copy_filelist_to(node,
+                          [test.get_filelist_dict(AGENT_SCRIPT, agent_dir)],
+                          add_to_cleanup=False)
+    with _AGENT_LOCK:
+        _AGENT_PUSHED.add((node, agent_path))
+    return agent_path
+
+
+def get_agent_cmd(agent_path, queries):
+    """
+    Description:
+        Get the command running the agent on a batch of queries. The JSON
+        batch is passed base64 encoded so it needs no shell quoting.
+    Args:
+        agent_path (str): Remote path of the agent script.
+        queries (list): Query dicts, see node_agent.py.
+    Returns:
+        str. The command, it prints AGENT_MISSING if the script is gone.
+    """
+    batch = base64.b64encode(json.dumps(queries).encode("utf-8"))
+    return ("if [ -f {agent} ]; then echo {batch} | /usr/bin/base64 -d | "
+            "/usr/bin/python {agent}; else echo {missing}; fi"
+            .format(agent=agent_path, batch=batch.decode("ascii"),
+                    missing=AGENT_MISSING))
+
+
+def query_node(test, node, queries, su_root=False):
+    """
+    Description:
+        Answer a batch of state queries on a node in a single round trip,
+        pushing the agent on first use. Every query must succeed.
+    Args:
+        test (GenericTest): The running test.
+        node (str): Node filename.
+        queries (list): Query dicts, such as
+                        {"query": "pkgs_installed", "packages": [...]},
+                        see node_agent.py for the supported queries.
+        su_root (bool): If True run the agent as root.
+    Returns:
+        list. The value answered to each query, in the same order.
+    """
+    agent_path = get_agent_path()
+    with _AGENT_LOCK:
+        pushed = (node, agent_path) in _AGENT_PUSHED
+    if not pushed:
+        push_agent(test, node)
+
+    cmd = get_agent_cmd(agent_path, queries)
+    out, err, ret_code = test.run_command(node, cmd, su_root=su_root)
+    if out == [AGENT_MISSING]:
+        # Removed since it was pushed, by a clean up of /tmp for example.
+        push_agent(test, node)
+        out, err, ret_code = test.run_command(node, cmd, su_root=su_root)
+    test.assertEqual(0, ret_code,
+                     "Node agent failed on {0}: {1}".format(node, err))
+
+    results = json.loads("\n".join(out))
+    test.assertEqual(len(queries), len(results))
+    failed = ["{0}: {1}".format(query, result["error"])
+              for query, result in zip(queries, results)
+              if not result["ok"]]
+    test.assertEqual([], failed,
+                     "Queries failed on {0}: {1}".format(node, failed))
+    return [result["value"] for result in results]
@@ -0,0 +1,847 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Parallel rpm installs on the nodes, batched import and
+            cleanup of the test rpms in the yum repositories, reboot time
+            statistics, and the caches of the installed packages and of
+            the model topology used by PackageInventoryMixin and
+            ModelCacheMixin.
+"""
+import hashlib
+import math
+import os
+import re
+import sys
+import threading
+import time
+from redhat_cmd_utils import RHCmdUtils
+
+# Upper bound of nodes worked on at the same time by run_on_nodes().
+MAX_NODE_WORKERS = 8
+
+# Commands after which the installed packages of a node may have changed.
+PKG_CHANGE_CMD_REGEX = re.compile(r"\brpm\s+-[a-zA-Z]*[iUFe]|\byum\b")
+# Commands after which the installed packages of every node may change.
+PLAN_CMD_REGEX = re.compile(r"\blitp\s+run_plan\b")
+
+# Item types whose find() results are cached by ModelCacheMixin. They make
+# up the topology of the model which the tests do not change.
+MODEL_CACHE_ITEM_TYPES = ("deployment", "cluster", "vcs-cluster", "node",
+                          "collection-of-software-item")
+# LITP commands which change the model, with their arguments.
+MODEL_CHANGE_CMD_REGEX = re.compile(
+    r"\blitp\s+(create|remove|inherit|restore_model|load)\b(.*)")
+
+# Text found in the rpm output lines which report a failed install.
+RPM_ERROR_MARKERS = ("error:", "is already installed", "is needed by",
+                     "conflicts with", "is obsoleted by")
+
+
+def run_on_nodes(func, nodes, max_workers=MAX_NODE_WORKERS):
+    """
+    Description:
+        Call func(node) for every node using a bounded pool of worker
+        threads. A failure on one node does not stop the others.
+    Args:
+        func (callable): Function taking a node filename.
+        nodes (list): Node filenames.
+        max_workers (int): Maximum number of nodes processed at once.
+    Returns:
+        tuple. (results, errors) where results maps each successful node
+        to the value returned by func and errors maps each failed node to
+        a description of the exception it raised.
+    """
+    results = {}
+    errors = {}
+    pending = list(nodes)
+    lock = threading.Lock()
+
+    def worker():
+        """ Take nodes from the pending list until it is empty. """
+        while True:
+            lock.acquire()
+            try:
+                if not pending:
+                    return
+                node = pending.pop(0)
+            finally:
+                lock.release()
+            try:
+                value = func(node)
+            except Exception:  # pylint: disable=broad-except
+                exc = sys.exc_info()[1]
+                lock.acquire()
+                try:
+                    errors[node] = "{0}: {1}".format(type(exc).__name__, exc)
+                finally:
+                    lock.release()
+            else:
+                lock.acquire()
+                try:
+                    results[node] = value
+                finally:
+                    lock.release()
+
+    threads = [threading.Thread(target=worker)
+               for _ in range(max(1, min(max_workers, len(pending))))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results, errors
+
+
+def format_node_errors(errors):
+    """
+    Description:
+        Format the errors returned by run_on_nodes() as a single message.
+    Args:
+        errors (dict): Error description keyed by node.
+    Returns:
+        str. One line per failed node.
+    """
+    return "\n".join("{0}: {1}".format(node, errors[node])
+                     for node in sorted(errors))
+
+
+def get_rpm_install_cmd(rpm_paths):
+    """
+    Description:
+        Get a command which installs all rpm files in one rpm transaction.
+    Args:
+        rpm_paths (list): Paths of the rpm files on the node.
+    Returns:
+        str. The rpm install command.
+    """
+    return "/bin/rpm -ivh {0}".format(" ".join(rpm_paths))
+
+
+def parse_rpm_install_errors(output, rpm_paths):
+    """
+    Description:
+        Attribute the error lines printed by a multi package rpm transaction
+        to the packages that caused them.
+    Args:
+        output (list): stdout and stderr lines of the rpm command.
+        rpm_paths (list): Paths of the rpm files given to the command.
+    Returns:
+        dict. Error lines keyed by rpm file name. Lines that can not be
+        attributed to a package are keyed by None.
+    """
+    names = []
+    for rpm_path in rpm_paths:
+        rpm_file = rpm_path.split("/")[-1]
+        names.append((rpm_path, rpm_file))
+        names.append((rpm_file, rpm_file))
+        if rpm_file.endswith(".rpm"):
+            names.append((rpm_file[:-4], rpm_file))
+
+    errors = {}
+    for line in output:
+        text = line.strip()
+        if not [marker for marker in RPM_ERROR_MARKERS if marker in text]:
+            continue
+        if text.startswith("error:") and text.endswith(":"):
+            # Header such as "error: Failed dependencies:", the details
+            # are on the following lines.
+            continue
+
+        # The package named first in the line is the one being installed,
+        # e.g. "file /x from install of <pkg> conflicts with ..."
+        owner = None
+        first_pos = len(text)
+        for name, rpm_file in names:
+            pos = text.find(name)
+            if pos != -1 and pos < first_pos:
+                owner, first_pos = rpm_file, pos
+        errors.setdefault(owner, []).append(text)
+
+    return errors
+
+
+def get_nevra(rpm_file):
+    """
+    Description:
+        Get the name-version-release.arch of an rpm file name.
+    Args:
+        rpm_file (str): RPM file name or path.
+    Returns:
+        str. The NEVRA, without directory and '.rpm' extension.
+    """
+    nevra = rpm_file.split("/")[-1]
+    if nevra.endswith(".rpm"):
+        nevra = nevra[:-4]
+    return nevra
+
+
+def get_rpms_availability(test, nodes, rpms):
+    """
+    Description:
+        Check which rpms are available from the yum repositories of each
+        node. Every node is queried once for all rpms and the nodes are
+        queried concurrently.
+    Args:
+        test (GenericTest): The running test.
+        nodes (list): Node filenames.
+        rpms (list): RPM file names or NEVRAs.
+    Returns:
+        dict. For each node a dict mapping every rpm to True if it is
+        available on the node, False otherwise.
+    """
+    nevras = [get_nevra(rpm) for rpm in rpms]
+    cmd = ("/usr/bin/repoquery -q --qf "
+           "'%{{name}}-%{{version}}-%{{release}}.%{{arch}}' {0}"
+           .format(" ".join(nevras)))
+
+    def query(node):
+        """ Get the set of NEVRAs available on a node. """
+        out, err, ret_code = test.run_command(node, cmd, su_root=True)
+        test.assertFalse(err)
+        test.assertEqual(0, ret_code)
+        return set(line.strip() for line in out)
+
+    results, errors = run_on_nodes(query, nodes)
+    test.assertEqual({}, errors, format_node_errors(errors))
+
+    availability = {}
+    for node in nodes:
+        availability[node] = dict((rpm, nevra in results[node])
+                                  for rpm, nevra in zip(rpms, nevras))
+    return availability
+
+
+def get_erase_installed_pkgs_cmd(packages):
+    """
+    Description:
+        Get a command which erases, in one rpm transaction, those of the
+        given packages that are installed. Packages that are not installed
+        are skipped instead of failing the whole transaction.
+    Args:
+        packages (list): Package names.
+    Returns:
+        str. The rpm erase command.
+    """
+    return ("/bin/rpm -q --qf '%{{NAME}}\\n' {0} | /bin/grep -v ' ' | "
+            "/usr/bin/xargs -r /bin/rpm -e --allmatches"
+            .format(" ".join(packages)))
+
+
+def timed_step(test, timings, step, func, *args, **kwargs):
+    """
+    Description:
+        Call func and record and log how long it took.
+    Args:
+        test (GenericTest): The running test, used for logging.
+        timings (list): List the (step, seconds) tuple is appended to.
+        step (str): Description of the step.
+        func (callable): The step to run.
+    Returns:
+        The value returned by func.
+    """
+    start = time.time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.time() - start
+        timings.append((step, elapsed))
+        test.log("info", "{0} took {1:.2f} seconds".format(step, elapsed))
+
+
+def get_percentile(values, percent):
+    """
+    Description:
+        Get a percentile of samples, interpolated linearly between the two
+        closest ranks, so a high percentile of a few samples is not simply
+        their maximum.
+    Args:
+        values (list): Samples.
+        percent (float): Percentile, from 0 to 100.
+    Returns:
+        float. The percentile, None if there are no samples.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = percent / 100.0 * (len(ordered) - 1)
+    lower = int(math.floor(rank))
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def format_distribution(name, values):
+    """ Describe the median, 95th percentile and maximum of samples. """
+    return ("{0}: {1} samples, p50 {2:.1f}s, p95 {3:.1f}s, max {4:.1f}s "
+            "({5})".format(name, len(values), get_percentile(values, 50),
+                           get_percentile(values, 95), max(values),
+                           ", ".join("{0:.1f}s".format(value)
+                                     for value in values)))
+
+
+def get_file_sha256(path):
+    """ Get the hex sha256 digest of a local file. """
+    digest = hashlib.sha256()
+    with open(path, "rb") as data:
+        for chunk in iter(lambda: data.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def import_rpms(test, ms_node, rpm_paths, repo, staging_dir):
+    """
+    Description:
+        Import local rpms into a repository on the MS with a single copy
+        and a single 'litp import' of a staging directory. Rpms which are
+        already in the repository with the same sha256 are left out, and
+        nothing is imported if none is left.
+    Args:
+        test (GenericTest): The running test.
+        ms_node (str): Filename of the MS.
+        rpm_paths (list): Local rpm files.
+        repo (str): Repository directory to import into.
+        staging_dir (str): Directory on the MS the rpms are copied to. It
+                           is emptied first and removed after the test.
+    Returns:
+        list. (step, seconds) of the copy and import steps.
+    """
+    timings = []
+    test.del_file_after_run(ms_node, staging_dir)
+    local_paths = dict((os.path.basename(path), path) for path in rpm_paths)
+    checksums = dict((rpm, get_file_sha256(path))
+                     for rpm, path in local_paths.items())
+
+    # Empty the staging directory and read the checksums of the rpms
+    # already in the repository in one command.
+    cmd = ("/bin/rm -rf {0} && /bin/mkdir -p {0} && "
+           "{{ cd {1} 2>/dev/null && /usr/bin/sha256sum {2} 2>/dev/null; "
+           "true; }}".format(staging_dir, repo,
+                             " ".join(sorted(local_paths))))
+    out, _, _ = test.run_command(ms_node, cmd, su_root=True,
+                                 default_asserts=True)
+    in_repo = dict(line.split()[::-1] for line in out if line.strip())
+    to_import = sorted(rpm for rpm in local_paths
+                       if in_repo.get(rpm) != checksums[rpm])
+    skipped = sorted(set(local_paths) - set(to_import))
+    if skipped:
+        test.log("info", "Already in {0}: {1}".format(repo,
+                                                      ", ".join(skipped)))
+    if not to_import:
+        return timings
+
+    filelist = [test.get_filelist_dict(local_paths[rpm], staging_dir)
+                for rpm in to_import]
+    copied = timed_step(test, timings,
+                        "Copy of {0} rpms".format(len(to_import)),
+                        test.copy_filelist_to, ms_node, filelist,
+                        root_copy=True)
+    test.assertTrue(copied)
+    timed_step(test, timings, "Import of {0} rpms".format(len(to_import)),
+               test.execute_cli_import_cmd, ms_node, staging_dir, repo)
+    return timings
+
+
+def cleanup_test_repo(test, ms_node, nodes, rpm_list, repo_path, packages,
+                      strict=True):
+    """
+    Description:
+        Remove test rpms from a yum repository on the MS and uninstall the
+        test packages from the nodes with as few commands as possible.
+    Actions:
+        1. Remove all RPMs from the yum repository with one command.
+        2. Update the yum repository once.
+        3. Clean the yum cache on the MS and all nodes concurrently.
+        4. Erase the test packages in one rpm transaction per node, on all
+           nodes concurrently.
+    Args:
+        test (GenericTest): The running test.
+        ms_node (str): The MS filename.
+        nodes (list): Filenames of the nodes to clean.
+        rpm_list (list): RPM files to remove from the repository.
+        repo_path (str): Path of the yum repository on the MS.
+        packages (list): Names of the packages to uninstall.
+        strict (bool): If True assert that every step succeeds.
+    Returns:
+        list. (step, seconds) tuple for each step.
+    """
+    timings = []
+
+    def run(node, cmd, **kwargs):
+        """
+        Run a command as root and assert on the result if strict. Warnings,
+        such as the .rpmsave notices of rpm -e, do not fail the step.
+        """
+        _, err, ret_code = test.run_command(node, cmd, su_root=True,
+                                            **kwargs)
+        if strict:
+            test.assertEqual(0, ret_code)
+            test.assertEqual([], [line for line in err
+                                  if not line.lower().startswith("warning")],
+                             "Errors on {0}: {1}".format(node, err))
+
+    def on_all(nodes, cmd):
+        """ Run a command on every node at the same time. """
+        _, errors = run_on_nodes(lambda node: run(node, cmd), nodes)
+        if strict:
+            test.assertEqual({}, errors, format_node_errors(errors))
+
+    # 1. Remove RPMs from the yum repository on MS.
+    test.log("info", "Removing: {0} from the repo: {1}"
+             .format(", ".join(rpm_list), repo_path))
+    cmd = "/bin/rm -f {0}".format(
+        " ".join("{0}/{1}".format(repo_path, rpm) for rpm in rpm_list))
+    timed_step(test, timings, "Remove rpms from repo", run, ms_node, cmd)
+
+    # 2. Update the yum repository.
+    cmd = "/usr/bin/createrepo --update " + repo_path
+    timed_step(test, timings, "Update repo", run, ms_node, cmd,
+               su_timeout_secs=120)
+
+    # 3. Clean the yum cache.
+    cmd = RHCmdUtils().get_yum_cmd("clean all")
+    timed_step(test, timings, "Clean yum cache", on_all,
+               nodes + [ms_node], cmd)
+
+    # 4. Uninstall test packages
+    cmd = get_erase_installed_pkgs_cmd(packages)
+    timed_step(test, timings, "Uninstall test packages", on_all, nodes, cmd)
+
+    return timings
+
+
+def parse_upgrade_states(show_output):
+    """
+    Description:
+        Get the state of every upgrade item from the output of a recursive
+        'litp show'.
+    Args:
+        show_output (list): Lines printed by 'litp show -r'.
+    Returns:
+        dict. State keyed by the path of the item holding the upgrade
+        item.
+    """
+    states = {}
+    path = None
+    for line in show_output:
+        if line.startswith("/"):
+            path = line.strip()
+            continue
+        stripped = line.strip()
+        if stripped == "properties:":
+            # The state of the item has been printed or is missing.
+            path = None
+        elif path and path.endswith("/upgrade") and \
+                stripped.startswith("state:"):
+            states[path[:-len("/upgrade")]] = \
+                stripped[len("state:"):].strip()
+            path = None
+    return states
+
+
+def get_upgrade_states(test, ms_node, root="/deployments"):
+    """
+    Description:
+        Read the state of every upgrade item of the nodes with a single
+        recursive 'litp show'.
+    Args:
+        test (GenericTest): The running test.
+        ms_node (str): Filename of the MS.
+        root (str): Model path to read the upgrade items under.
+    Returns:
+        dict. State of the upgrade item keyed by node filename. Nodes
+        without an upgrade item are left out.
+    """
+    show_cmd = test.cli.get_show_cmd(root, "-r")
+    out, _, _ = test.run_command(ms_node, show_cmd, default_asserts=True)
+    node_urls = test.find(ms_node, root, "node")
+    states = {}
+    for url, state in parse_upgrade_states(out).items():
+        if url in node_urls:
+            states[test.get_node_filename_from_url(ms_node, url)] = state
+    return states
+
+
+class PackageInventory(object):
+    """
+    Snapshot of the packages installed on each node. A node is queried
+    with a single 'rpm -qa' and all later checks are answered from memory
+    until the snapshot of the node is invalidated.
+    """
+    QUERY_CMD = ("/bin/rpm -qa --qf "
+                 "'%{NAME} %{VERSION} %{RELEASE} %{ARCH}\\n'")
+
+    def __init__(self, test):
+        self.test = test
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, node=None):
+        """ Drop the snapshot of a node, or of all nodes if node is None. """
+        self._lock.acquire()
+        try:
+            if node is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(node, None)
+        finally:
+            self._lock.release()
+
+    def get_installed(self, node):
+        """
+        Get the packages installed on a node. Every package is listed as
+        name, name-version, name-version-release and its full NEVRA, so
+        any of those forms can be looked up, as with 'rpm -q'.
+        """
+        self._lock.acquire()
+        try:
+            snapshot = self._snapshots.get(node)
+        finally:
+            self._lock.release()
+        if snapshot is not None:
+            return snapshot
+
+        out, err, ret_code = self.test.run_command(node, self.QUERY_CMD)
+        self.test.assertEqual([], err)
+        self.test.assertEqual(0, ret_code)
+
+        snapshot = set()
+        for line in out:
+            fields = line.split()
+            if len(fields) != 4:
+                continue
+            name, version, release, arch = fields
+            snapshot.add(name)
+            snapshot.add("{0}-{1}".format(name, version))
+            snapshot.add("{0}-{1}-{2}".format(name, version, release))
+            snapshot.add("{0}-{1}-{2}.{3}".format(name, version, release,
+                                                  arch))
+
+        self._lock.acquire()
+        try:
+            self._snapshots[node] = snapshot
+        finally:
+            self._lock.release()
+        return snapshot
+
+    def is_installed(self, node, pkg):
+        """ Check if a package, or an rpm file's NEVRA, is installed. """
+        return get_nevra(pkg) in self.get_installed(node)
+
+    def are_installed(self, node, pkgs):
+        """ Check if all the packages are installed on a node. """
+        installed = self.get_installed(node)
+        return not [pkg for pkg in pkgs if get_nevra(pkg) not in installed]
+
+
+class PackageInventoryMixin(object):
+    """
+    Test mixin which answers check_pkgs_installed() from a PackageInventory
+    and invalidates the inventory whenever a plan is run, an rpm is
+    installed or removed or yum is used.
+
+    It must be listed before GenericTest in the base classes of a test.
+    """
+
+    @property
+    def pkg_inventory(self):
+        """ The PackageInventory of the test, created on first use. """
+        inventory = getattr(self, "_pkg_inventory", None)
+        if inventory is None:
+            inventory = PackageInventory(self)
+            self._pkg_inventory = inventory
+        return inventory
+
+    def check_pkgs_installed(self, node, pkgs, *args, **kwargs):
+        """ Check if all packages are installed, using the inventory. """
+        if args or kwargs:
+            return super(PackageInventoryMixin, self).check_pkgs_installed(
+                node, pkgs, *args, **kwargs)
+        return self.pkg_inventory.are_installed(node, pkgs)
+
+    def run_command(self, node, cmd, *args, **kwargs):
+        """ Run a command, invalidating the inventory if it changes it. """
+        try:
+            return super(PackageInventoryMixin, self).run_command(
+                node, cmd, *args, **kwargs)
+        finally:
+            if PLAN_CMD_REGEX.search(cmd):
+                self.pkg_inventory.invalidate()
+            elif PKG_CHANGE_CMD_REGEX.search(cmd):
+                self.pkg_inventory.invalidate(node)
+
+    def execute_cli_runplan_cmd(self, *args, **kwargs):
+        """ Run the plan and invalidate the inventory of all nodes. """
+        self.pkg_inventory.invalidate()
+        return super(PackageInventoryMixin, self).execute_cli_runplan_cmd(
+            *args, **kwargs)
+
+    def run_and_check_plan(self, *args, **kwargs):
+        """ Run the plan and invalidate the inventory of all nodes. """
+        try:
+            return super(PackageInventoryMixin, self).run_and_check_plan(
+                *args, **kwargs)
+        finally:
+            self.pkg_inventory.invalidate()
+
+    def wait_for_plan_state(self, *args, **kwargs):
+        """ Packages change while a plan runs, drop them once it stops. """
+        try:
+            return super(PackageInventoryMixin, self).wait_for_plan_state(
+                *args, **kwargs)
+        finally:
+            self.pkg_inventory.invalidate()
+
+    def install_rpm_on_node(self, node, *args, **kwargs):
+        """ Install an rpm and invalidate the inventory of the node. """
+        try:
+            return super(PackageInventoryMixin, self).install_rpm_on_node(
+                node, *args, **kwargs)
+        finally:
+            self.pkg_inventory.invalidate(node)
+
+    def remove_rpm_on_node(self, node, *args, **kwargs):
+        """ Remove an rpm and invalidate the inventory of the node. """
+        try:
+            return super(PackageInventoryMixin, self).remove_rpm_on_node(
+                node, *args, **kwargs)
+        finally:
+            self.pkg_inventory.invalidate(node)
+
+    def copy_and_install_rpms(self, node, *args, **kwargs):
+        """ Install rpms and invalidate the inventory of the node. """
+        try:
+            return super(PackageInventoryMixin, self).copy_and_install_rpms(
+                node, *args, **kwargs)
+        finally:
+            self.pkg_inventory.invalidate(node)
+
+
+class ModelCache(object):
+    """
+    find() results and node URL, filename and hostname mappings, kept in
+    memory until a change of the model affects them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (root, item_type, paths) keyed by find() arguments.
+        self._finds = {}
+        self.node_urls = {}
+        self.node_filenames = {}
+        self.node_hostnames = {}
+
+    def get_find(self, key):
+        """ Get the cached paths of a find() call, None if not cached. """
+        self._lock.acquire()
+        try:
+            entry = self._finds.get(key)
+        finally:
+            self._lock.release()
+        if entry is None:
+            return None
+        return list(entry[2])
+
+    def set_find(self, key, root, item_type, paths):
+        """ Cache the paths returned by a find() call. """
+        self._lock.acquire()
+        try:
+            self._finds[key] = (root, item_type, list(paths))
+        finally:
+            self._lock.release()
+
+    def set_nodes(self, node_urls, hostnames):
+        """ Cache the URL and hostname of each node, keyed by filename. """
+        self._lock.acquire()
+        try:
+            self.node_urls = dict(node_urls)
+            self.node_filenames = dict((url, filename) for filename, url
+                                       in node_urls.items())
+            self.node_hostnames = dict(hostnames)
+        finally:
+            self._lock.release()
+
+    def invalidate(self, action=None, path=None, item_type=None):
+        """
+        Description:
+            Drop the cached data a model change may have affected.
+        Args:
+            action (str): 'create', 'remove' or 'inherit'. Anything else,
+                          e.g. 'restore_model', drops the whole cache.
+            path (str): Path of the created, removed or inherited item.
+            item_type (str): Type of the created item, if known.
+        """
+        self._lock.acquire()
+        try:
+            for key, (root, cached_type, paths) in list(self._finds.items()):
+                if action == "create" and path:
+                    affected = (path.startswith(root) and
+                                item_type in (None, cached_type))
+                elif action in ("remove", "inherit") and path:
+                    affected = [held for held in paths if held == path or
+                                held.startswith(path.rstrip("/") + "/")]
+                else:
+                    affected = True
+                if affected:
+                    del self._finds[key]
+                    if cached_type == "node":
+                        self.node_urls = {}
+                        self.node_filenames = {}
+                        self.node_hostnames = {}
+        finally:
+            self._lock.release()
+
+
+def parse_litp_change_cmd(cmd):
+    """
+    Description:
+        Get the action, path and item type of a LITP command which changes
+        the model.
+    Args:
+        cmd (str): A command.
+    Returns:
+        tuple. (action, path, item_type), None for the values not given by
+        the command, or None if the command does not change the model.
+    """
+    match = MODEL_CHANGE_CMD_REGEX.search(cmd)
+    if not match:
+        return None
+    action, args = match.groups()
+    path = re.search(r"-p\s+['\"]?([^\s'\"]+)", args)
+    item_type = re.search(r"-t\s+['\"]?([^\s'\"]+)", args)
+    return (action,
+            path.group(1) if path else None,
+            item_type.group(1) if item_type else None)
+
+
+class ModelCacheMixin(object):
+    """
+    Test mixin which serves find() calls for the model topology and the
+    node URL, filename and hostname mappings from a cache shared by all
+    tests of the class. Only create, remove and inherit calls that touch
+    the cached paths, or a restore of the model, invalidate it.
+
+    It must be listed before GenericTest in the base classes of a test.
+    """
+
+    @property
+    def model_cache(self):
+        """ The ModelCache of the test class, created on first use. """
+        cls = type(self)
+        cache = cls.__dict__.get("_model_cache")
+        if cache is None:
+            cache = ModelCache()
+            cls._model_cache = cache
+        return cache
+
+    def find(self, node, path, resource, *args, **kwargs):
+        """ Find model items, from the cache for topology item types. """
+        if resource not in MODEL_CACHE_ITEM_TYPES:
+            return super(ModelCacheMixin, self).find(node, path, resource,
+                                                     *args, **kwargs)
+        key = (node, path, resource, args, tuple(sorted(kwargs.items())))
+        paths = self.model_cache.get_find(key)
+        if paths is None:
+            paths = super(ModelCacheMixin, self).find(node, path, resource,
+                                                      *args, **kwargs)
+            self.model_cache.set_find(key, path, resource, paths)
+        return list(paths)
+
+    def _load_node_mappings(self, ms_node):
+        """ Read the URL and hostname of every node into the cache. """
+        if self.model_cache.node_urls:
+            return
+        node_urls = {}
+        hostnames = {}
+        for url in self.find(ms_node, "/deployments", "node"):
+            filename = super(ModelCacheMixin, self).\
+                get_node_filename_from_url(ms_node, url)
+            if filename:
+                node_urls[filename] = url
+                hostnames[filename] = self.get_node_att(filename, "hostname")
+        self.model_cache.set_nodes(node_urls, hostnames)
+
+    def get_node_url_from_filename(self, ms_node, filename):
+        """ Get the model URL of a node from the cache. """
+        self._load_node_mappings(ms_node)
+        url = self.model_cache.node_urls.get(filename)
+        if url is None:
+            url = super(ModelCacheMixin, self).get_node_url_from_filename(
+                ms_node, filename)
+        return url
+
+    def get_node_filename_from_url(self, ms_node, url):
+        """ Get the filename of a node from its model URL, from the cache. """
+        self._load_node_mappings(ms_node)
+        filename = self.model_cache.node_filenames.get(url)
+        if filename is None:
+            filename = super(ModelCacheMixin, self).\
+                get_node_filename_from_url(ms_node, url)
+        return filename
+
+    def get_node_hostname(self, ms_node, filename):
+        """ Get the hostname of a node from the cache. """
+        self._load_node_mappings(ms_node)
+        hostname = self.model_cache.node_hostnames.get(filename)
+        if hostname is None:
+            hostname = self.get_node_att(filename, "hostname")
+        return hostname
+
+    def execute_cli_create_cmd(self, node, url, class_type, *args,
+                               **kwargs):
+        """ Create an item and invalidate the cache entries it affects. """
+        try:
+            return super(ModelCacheMixin, self).execute_cli_create_cmd(
+                node, url, class_type, *args, **kwargs)
+        finally:
+            self.model_cache.invalidate("create", url, class_type)
+
+    def execute_cli_remove_cmd(self, node, url, *args, **kwargs):
+        """ Remove an item and invalidate the cache entries it affects. """
+        try:
+            return super(ModelCacheMixin, self).execute_cli_remove_cmd(
+                node, url, *args, **kwargs)
+        finally:
+            self.model_cache.invalidate("remove", url)
+
+    def execute_cli_inherit_cmd(self, node, url, *args, **kwargs):
+        """ Inherit an item and invalidate the cache entries it affects. """
+        try:
+            return super(ModelCacheMixin, self).execute_cli_inherit_cmd(
+                node, url, *args, **kwargs)
+        finally:
+            self.model_cache.invalidate("inherit", url)
+
+    def execute_cli_restoremodel_cmd(self, *args, **kwargs):
+        """ Restore the model and drop the whole cache. """
+        try:
+            return super(ModelCacheMixin, self).\
+                execute_cli_restoremodel_cmd(*args, **kwargs)
+        finally:
+            self.model_cache.invalidate()
+
+    def run_command(self, node, cmd, *args, **kwargs):
+        """ Run a command, invalidating the cache if it changes the model. """
+        try:
+            return super(ModelCacheMixin, self).run_command(node, cmd, *args,
+                                                            **kwargs)
+        finally:
+            change = parse_litp_change_cmd(cmd)
+            if change:
+                self.model_cache.invalidate(*change)
+
+    def run_commands(self, node, cmds, *args, **kwargs):
+        """ Run commands, invalidating the cache if they change the model. """
+        try:
+            return super(ModelCacheMixin, self).run_commands(node, cmds,
+                                                             *args, **kwargs)
+        finally:
+            for cmd in cmds:
+                change = parse_litp_change_cmd(cmd)
+                if change:
+                    self.model_cache.invalidate(*change)
@@ -0,0 +1,550 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Plan, the tasks of a 'litp show_plan' indexed by node
+            hostname and description word, and PlanMonitor, which follows
+            a running plan and times its tasks.
+"""
+import re
+import sys
+import threading
+import time
+import test_constants
+
+# Node hostnames quoted in task descriptions, e.g. 'Reboot node "node1"'.
+NODE_IN_DESC_REGEX = re.compile(r'node "([^"]+)"')
+WORD_REGEX = re.compile(r"\w+")
+# Task states of a plan which has not started or finished the task.
+TASK_PENDING_STATES = ("Initial",)
+TASK_ACTIVE_STATES = ("Running",)
+TASK_FAILED_STATE = "Failed"
+# Plan states in which the plan will not change any more by itself.
+PLAN_END_STATES = (test_constants.PLAN_COMPLETE, test_constants.PLAN_FAILED,
+                   test_constants.PLAN_STOPPED)
+
+
+def _words(text):
+    """ Get the set of lower case words of a text. """
+    return set(WORD_REGEX.findall(text.lower()))
+
+
+class PlanTask(object):
+    """ A task of a plan. """
+
+    __slots__ = ("phase", "number", "status", "path", "description",
+                 "hostnames")
+
+    def __init__(self, phase, number, status, path, description):
+        self.phase = phase
+        self.number = number
+        self.status = status
+        self.path = path
+        self.description = description
+        self.hostnames = set(NODE_IN_DESC_REGEX.findall(description))
+
+    def __repr__(self):
+        return "PlanTask({0}.{1} {2} {3} '{4}')".format(
+            self.phase, self.number, self.status, self.path,
+            self.description)
+
+
+class Plan(object):
+    """
+    The tasks of a plan, indexed by node hostname and description word so
+    that queries do not scan the whole plan.
+    """
+
+    def __init__(self, tasks, node_hostnames=None, state=None):
+        """
+        Args:
+            tasks (list): PlanTask objects.
+            node_hostnames (dict): Hostname keyed by node model path, used
+                                   to index the tasks of a node's items
+                                   under its hostname.
+            state (int): State of the plan, from test_constants, if known.
+        """
+        self.tasks = list(tasks)
+        self.state = state
+        self._by_hostname = {}
+        self._by_word = {}
+        node_hostnames = node_hostnames or {}
+
+        for task in self.tasks:
+            hostnames = set(task.hostnames)
+            for node_url, hostname in node_hostnames.items():
+                if task.path == node_url or \
+                        task.path.startswith(node_url + "/"):
+                    hostnames.add(hostname)
+            for hostname in hostnames:
+                self._by_hostname.setdefault(hostname, []).append(task)
+
+            for word in _words(task.description):
+                self._by_word.setdefault(word, set()).add(task)
+
+    @classmethod
+    def from_plan_output(cls, plan_dict, node_hostnames=None, state=None):
+        """
+        Description:
+            Build a Plan from the dict returned by CLIUtils.parse_plan_output.
+        Args:
+            plan_dict (dict): Tasks keyed by task number, keyed by phase
+                              number.
+            node_hostnames (dict): Hostname keyed by node model path.
+            state (int): State of the plan, from test_constants, if known.
+        Returns:
+            Plan. The plan.
+        """
+        tasks = []
+        for phase_number, phase in sorted(plan_dict.items()):
+            for task_number, task in sorted(phase.items()):
+                desc = task.get("DESC", [])
+                if not isinstance(desc, list):
+                    desc = [desc]
+                paths = [line.strip() for line in desc
+                         if line.strip().startswith("/")]
+                text = [line.strip() for line in desc
+                        if not line.strip().startswith("/")]
+                tasks.append(PlanTask(phase_number, task_number,
+                                      task.get("STATUS"),
+                                      paths[0] if paths else "",
+                                      " ".join(text)))
+        return cls(tasks, node_hostnames, state)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def tasks_for_hostname(self, hostname):
+        """ Get the tasks which name a node or act on one of its items. """
+        return list(self._by_hostname.get(hostname, []))
+
+    def _tasks_with_word(self, word, cut_start, cut_end):
+        """
+        Get the tasks with a description word. A word which may have been
+        cut at the start or end of the searched text matches any indexed
+        word ending or starting with it.
+        """
+        if not cut_start and not cut_end:
+            return self._by_word.get(word, set())
+        tasks = set()
+        for indexed_word, word_tasks in self._by_word.items():
+            if (cut_start and cut_end and word in indexed_word) or \
+                    (cut_start and not cut_end and
+                     indexed_word.endswith(word)) or \
+                    (cut_end and not cut_start and
+                     indexed_word.startswith(word)):
+                tasks |= word_tasks
+        return tasks
+
+    def find(self, text):
+        """
+        Description:
+            Get the tasks whose description contains a text. Only the tasks
+            holding every word of the text are compared with it.
+        Args:
+            text (str): Text to look for.
+        Returns:
+            list. The matching tasks, in plan order.
+        """
+        matches = list(WORD_REGEX.finditer(text.lower()))
+        if not matches:
+            return [task for task in self.tasks if text in task.description]
+        candidates = None
+        for match in matches:
+            tasks = self._tasks_with_word(match.group(), match.start() == 0,
+                                          match.end() == len(text))
+            candidates = tasks if candidates is None else candidates & tasks
+            if not candidates:
+                return []
+        return sorted((task for task in candidates
+                       if text in task.description),
+                      key=lambda task: (task.phase, task.number))
+
+    def has_task(self, text):
+        """ Check if a task description contains a text. """
+        return bool(self.find(text))
+
+
+def get_plan(test, ms_node):
+    """
+    Description:
+        Read the current plan with a single 'litp show_plan'.
+    Args:
+        test (GenericTest): The running test. It must use ModelCacheMixin
+                            so the node hostnames are read from memory.
+        ms_node (str): Filename of the MS.
+    Returns:
+        Plan. The indexed plan.
+    """
+    out, _, _ = test.execute_cli_showplan_cmd(ms_node)
+    node_hostnames = {}
+    for url in test.find(ms_node, "/deployments", "node"):
+        node = test.get_node_filename_from_url(ms_node, url)
+        node_hostnames[url] = test.get_node_hostname(ms_node, node)
+    return Plan.from_plan_output(test.cli.parse_plan_output(out),
+                                 node_hostnames)
+
+
+def read_plan(test, ms_node, node_hostnames=None):
+    """
+    Description:
+        Read the current plan and its state with a single 'litp
+        show_plan', without asserting on errors as the plan may be read
+        while LITP restarts.
+    Args:
+        test (GenericTest): The running test.
+        ms_node (str): Filename of the MS.
+        node_hostnames (dict): Hostname keyed by node model path.
+    Returns:
+        Plan. The indexed plan, None if it could not be read.
+    """
+    out, _, rc = test.run_command(ms_node, test.cli.get_show_plan_cmd())
+    if rc != 0 or not out:
+        return None
+    return Plan.from_plan_output(test.cli.parse_plan_output(out),
+                                 node_hostnames, test.cli.get_plan_state(out))
+
+
+class TaskEvent(object):
+    """ A change of state of a task, seen by PlanMonitor. """
+
+    __slots__ = ("time", "phase", "number", "description", "old_status",
+                 "new_status")
+
+    def __init__(self, task, old_status, event_time):
+        self.time = event_time
+        self.phase = task.phase
+        self.number = task.number
+        self.description = task.description
+        self.old_status = old_status
+        self.new_status = task.status
+
+    def __str__(self):
+        return "{0:.0f} task {1}.{2} '{3}': {4} -> {5}".format(
+            self.time, self.phase, self.number, self.description,
+            self.old_status, self.new_status)
+
+
+class TaskTiming(object):
+    """ When PlanMonitor saw a task start and end. """
+
+    __slots__ = ("phase", "number", "description", "started", "ended")
+
+    def __init__(self, task):
+        self.phase = task.phase
+        self.number = task.number
+        self.description = task.description
+        self.started = None
+        self.ended = None
+
+    @property
+    def duration(self):
+        """ Seconds the task ran, None until it has ended. """
+        if self.started is None or self.ended is None:
+            return None
+        return self.ended - self.started
+
+
+class PlanMonitor(object):
+    """
+    Follows a running plan by reading it repeatedly. The reads are
+    frequent while tasks change state and back off while nothing changes.
+    Every change of task state is recorded as a TaskEvent and passed to
+    the listeners, and the start and end of each task are timed.
+
+    Times are those of the reads which saw the change, so they are accurate
+    to the polling interval at the time. A task which was not seen running
+    and ended during a gap in the reads, longer than the polling interval,
+    is left untimed. follow() keeps reading from a background thread while
+    the test is busy with something else.
+    """
+
+    def __init__(self, test, ms_node, min_interval=2, max_interval=10):
+        """
+        Args:
+            test (GenericTest): The running test.
+            ms_node (str): Filename of the MS.
+            min_interval (int): Delay between reads after a change, in
+                                seconds.
+            max_interval (int): Longest delay between reads, in seconds.
+        """
+        self.test = test
+        self.ms_node = ms_node
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.plan = None
+        # State of the plan at the last read, None if it failed.
+        self.state = None
+        self.events = []
+        # Callables taking each TaskEvent as it is seen.
+        self.listeners = []
+        # TaskTiming keyed by (phase, task number).
+        self.timings = {}
+        self._statuses = {}
+        self._last_read = None
+        # Why the last wait() returned False.
+        self.failure = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _time_task(self, timing, status, now):
+        """ Record the start or end of a task which changed state. """
+        ended = status not in TASK_PENDING_STATES + TASK_ACTIVE_STATES
+        if self._last_read is None and ended:
+            # The task ended before the monitor started, its run time is
+            # unknown.
+            return
+        if timing.started is None and status not in TASK_PENDING_STATES:
+            if status in TASK_ACTIVE_STATES or self._last_read is None:
+                timing.started = now
+            elif now - self._last_read <= 2 * self.max_interval:
+                # The task was not seen running, it started at the
+                # latest right after the previous read.
+                timing.started = self._last_read
+            else:
+                # The plan was not read for a while, when the task started
+                # is unknown.
+                return
+        if timing.started is not None and timing.ended is None and ended:
+            timing.ended = now
+
+    def poll(self):
+        """
+        Description:
+            Read the plan and record the tasks which changed state since
+            the previous read.
+        Returns:
+            list. The new TaskEvent objects.
+        """
+        self._lock.acquire()
+        try:
+            return self._poll()
+        finally:
+            self._lock.release()
+
+    def _poll(self):
+        """ Read the plan and record the changes, see poll(). """
+        plan = read_plan(self.test, self.ms_node)
+        now = time.time()
+        self.state = None if plan is None else plan.state
+        if plan is None:
+            return []
+        new_events = []
+        for task in plan:
+            key = (task.phase, task.number)
+            old_status = self._statuses.get(key)
+            timing = self.timings.get(key)
+            if timing is None:
+                timing = self.timings[key] = TaskTiming(task)
+            if task.status != old_status:
+                if old_status is not None:
+                    new_events.append(TaskEvent(task, old_status, now))
+                self._time_task(timing, task.status, now)
+            self._statuses[key] = task.status
+        self.plan = plan
+        self._last_read = now
+
+        for event in new_events:
+            self.test.log("info", "Plan monitor: {0}".format(event))
+            for listener in self.listeners:
+                listener(event)
+        self.events.extend(new_events)
+        return new_events
+
+    def follow(self, pool=None):
+        """
+        Description:
+            Keep reading the plan from a background thread, with the same
+            backoff as wait(), until stop() is called.
+        Args:
+            pool (NodeConnectionPool): If given the reads are made through
+                                       it, so that it does not reset the
+                                       connections in the middle of one.
+        """
+        def read():
+            """ Read the plan, reporting rather than raising errors. """
+            try:
+                if pool is None:
+                    return self.poll()
+                return pool.call(self.ms_node, self.poll)[1]
+            except Exception:  # pylint: disable=broad-except
+                self.test.log("info", "Plan monitor: read failed: {0}"
+                              .format(sys.exc_info()[1]))
+                return None
+
+        def run():
+            """ Read the plan until stopped. """
+            interval = self.min_interval
+            while not self._stop.is_set():
+                if read():
+                    interval = self.min_interval
+                else:
+                    interval = min(interval * 2, self.max_interval)
+                self._stop.wait(interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the reads started by follow(). """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def wait(self, state, timeout_mins=10, until=None, fail_fast=False,
+             stall_mins=None):
+        """
+        Description:
+            Follow the plan until it reaches a state.
+        Args:
+            state (int): The expected plan state, from test_constants.
+            timeout_mins (int): Time to wait, in minutes.
+            until (callable): Optional check, taking the monitor, which
+                              ends the wait early when it returns True.
+            fail_fast (bool): If True stop waiting as soon as the plan
+                              ends in another state.
+            stall_mins (int): If given, stop waiting when no task has
+                              changed state for that many minutes.
+        Returns:
+            bool. True if the plan reached the state or the check passed.
+            When False, failure describes why the wait stopped.
+        """
+        self.failure = None
+        start = time.time()
+        deadline = start + timeout_mins * 60
+        interval = self.min_interval
+        while True:
+            if self.poll():
+                interval = self.min_interval
+            else:
+                interval = min(interval * 2, self.max_interval)
+            if until is not None and until(self):
+                return True
+            # The state comes from the same read as the tasks, so the
+            # final state of the tasks is already recorded.
+            plan_state = self.state
+            if plan_state == state:
+                return True
+
+            now = time.time()
+            last_change = max(start, self.events[-1].time) if self.events \
+                else start
+            if fail_fast and plan_state in PLAN_END_STATES:
+                self.failure = "Plan ended in state {0}, expected {1}. " \
+                    "{2}".format(plan_state, state,
+                                 self._describe_tasks(TASK_FAILED_STATE))
+            elif stall_mins is not None and \
+                    now - last_change >= stall_mins * 60:
+                self.failure = "No task changed state for {0} minutes. " \
+                    "{1}".format(stall_mins,
+                                 self._describe_tasks(*TASK_ACTIVE_STATES))
+            elif now >= deadline:
+                self.failure = "Plan not in state {0} after {1} minutes" \
+                    .format(state, timeout_mins)
+            if self.failure is not None:
+                self.test.log("info", "Plan monitor: {0}"
+                              .format(self.failure))
+                return False
+            time.sleep(interval)
+
+    def _describe_tasks(self, *statuses):
+        """ Describe the tasks of the last plan read in given states. """
+        tasks = [task for task in self.plan or []
+                 if task.status in statuses]
+        if not tasks:
+            return "No {0} task.".format("/".join(statuses))
+        return " ".join("{0} task {1}.{2} {3}: '{4}'.".format(
+            task.status, task.phase, task.number, task.path,
+            task.description) for task in tasks)
+
+    def durations(self, text=None):
+        """
+        Description:
+            Get the run time of the ended tasks.
+        Args:
+            text (str): Only the tasks whose description contains it.
+        Returns:
+            list. (description, seconds) of each task, in plan order.
+        """
+        return [(timing.description, timing.duration)
+                for _, timing in sorted(self.timings.items())
+                if timing.duration is not None and
+                (text is None or text in timing.description)]
+
+    def phase_durations(self):
+        """
+        Description:
+            Get the run time of the phases whose tasks all ended, from the
+            start of the first task to the end of the last one.
+        Returns:
+            dict. Seconds keyed by phase number.
+        """
+        phases = {}
+        for (phase, _), timing in self.timings.items():
+            phases.setdefault(phase, []).append(timing)
+        durations = {}
+        for phase, timings in phases.items():
+            if all(timing.duration is not None for timing in timings):
+                durations[phase] = (max(t.ended for t in timings) -
+                                    min(t.started for t in timings))
+        return durations
+
+    def summary(self):
+        """ Describe the run time of the tasks and phases. """
+        lines = ["{0:.1f}s '{1}'".format(duration, description)
+                 for description, duration in self.durations()]
+        lines.extend("{0:.1f}s phase {1}".format(duration, phase)
+                     for phase, duration
+                     in sorted(self.phase_durations().items()))
+        return "\n".join(lines)
+
+
+class PlanMonitorMixin(object):
+    """
+    Test mixin which follows the plan with a PlanMonitor in
+    wait_for_plan_state() and logs the run time of its tasks and phases.
+    The monitor of the last wait is kept in plan_monitor.
+
+    A test class can set plan_fail_fast to stop waiting as soon as the plan
+    ends in another state than the one expected, and plan_stall_mins to
+    stop waiting when no task changes state for that long.
+
+    It must be listed before GenericTest in the base classes of a test.
+    """
+
+    plan_monitor = None
+    plan_fail_fast = False
+    plan_stall_mins = None
+
+    def wait_for_plan_state(self, node, state, timeout_mins=10, *args,
+                            **kwargs):
+        """ Wait for a plan state, timing the tasks of the plan. """
+        if args or kwargs:
+            return super(PlanMonitorMixin, self).wait_for_plan_state(
+                node, state, timeout_mins, *args, **kwargs)
+        self.plan_monitor = PlanMonitor(self, node)
+        try:
+            return self.plan_monitor.wait(state, timeout_mins,
+                                          fail_fast=self.plan_fail_fast,
+                                          stall_mins=self.plan_stall_mins)
+        finally:
+            self.log("info", "Plan timings:\n{0}"
+                     .format(self.plan_monitor.summary()))
+
+    def get_plan_failure(self):
+        """ Get why the last wait_for_plan_state() returned False. """
+        if self.plan_monitor is None:
+            return None
+        return self.plan_monitor.failure
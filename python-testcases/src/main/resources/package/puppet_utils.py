@@ -0,0 +1,127 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   PuppetWatcher, which times the service start and the first
+            catalog run of the puppet agent of a rebooted node on the node
+            itself.
+"""
+import sys
+import threading
+import time
+import node_utils
+
+PUPPET_RUN_EVENTS = ("service_start", "catalog_start", "catalog_end")
+# Default watch timeout for each event a watch can stop at. The service
+# starts early in the boot, a catalog run can take minutes.
+PUPPET_WATCH_TIMEOUTS = {"service_start": 300, "catalog_start": 300,
+                         "catalog_end": 600}
+
+
+class PuppetRun(object):
+    """
+    Times, in seconds since the epoch on the clock of the test, at which
+    the puppet service of a node became active and its first catalog run
+    after boot started and completed. An event not seen is None.
+    """
+
+    def __init__(self, node, events, clock_offset):
+        self.node = node
+        self.clock_offset = clock_offset
+        for name in PUPPET_RUN_EVENTS:
+            node_time = events.get(name)
+            setattr(self, name, None if node_time is None
+                    else node_time + clock_offset)
+
+    @property
+    def ready(self):
+        """ When puppet started running, the service start. """
+        return self.service_start
+
+    def __str__(self):
+        def since_service_start(event):
+            """ Format the time of an event relative to the service start. """
+            if event is None or self.service_start is None:
+                return "-"
+            return "+{0:.1f}s".format(event - self.service_start)
+
+        return ("{0}: puppet service started at {1}, catalog run started "
+                "{2}, completed {3}".format(
+                    self.node, "-" if self.service_start is None else
+                    time.strftime("%H:%M:%S",
+                                  time.localtime(self.service_start)),
+                    since_service_start(self.catalog_start),
+                    since_service_start(self.catalog_end)))
+
+
+class PuppetWatcher(object):
+    """
+    Watches the puppet agent of a node from a background thread, with a
+    single long running call of the node agent which checks the systemd
+    state of the service and the puppet state files every fraction of a
+    second. Event times are read on the node: the service start from
+    systemd, the catalog run start from agent_catalog_run.lock and its
+    end from last_run_summary.yaml, so they do not depend on how often
+    the node is polled. They are converted to the clock of the test when
+    the watch ends.
+
+    The watch ends at the until event, by default the service start.
+    Waiting for the first catalog run to complete is opt-in, with
+    until="catalog_end".
+    """
+
+    def __init__(self, test, node, until="service_start", timeout_secs=None):
+        self.test = test
+        self.node = node
+        self.until = until
+        self.timeout_secs = PUPPET_WATCH_TIMEOUTS[until] \
+            if timeout_secs is None else timeout_secs
+        self.run = None
+        self.error = None
+        self._thread = None
+
+    def start(self):
+        """ Start watching, the node must accept SSH connections. """
+        self._thread = threading.Thread(target=self._watch)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def _watch(self):
+        """ Run the watch on the node and keep the PuppetRun. """
+        try:
+            events = node_utils.query_node(self.test, self.node, [
+                {"query": "puppet_run", "until": self.until,
+                 "timeout_secs": self.timeout_secs}])[0]
+            # The watch ends right before the node prints its answer, so
+            # the offset is only off by the time the answer takes to come
+            # back.
+            clock_offset = time.time() - events["now"]
+            self.run = PuppetRun(self.node, events, clock_offset)
+            self.test.log("info", str(self.run))
+        except Exception:  # pylint: disable=broad-except
+            exc = sys.exc_info()[1]
+            self.error = "{0}: {1}".format(type(exc).__name__, exc)
+
+    def wait(self, timeout_secs=None):
+        """
+        Description:
+            Wait for the watch to end, at the until event of the current
+            boot or at the watch timeout.
+        Args:
+            timeout_secs (int): Longest wait, the watch timeout if None.
+        Returns:
+            PuppetRun. The times seen, None if the watch failed or is
+            still running.
+        """
+        self._thread.join(self.timeout_secs + 60 if timeout_secs is None
+                          else timeout_secs)
+        if self.error is not None:
+            self.test.log("error", "Watch of puppet on {0} failed: {1}"
+                          .format(self.node, self.error))
+        return self.run
@@ -0,0 +1,331 @@
+"""
+COPYRIGHT Ericsson 2026
+The copyright to the computer program(s) herein is the property of
+Ericsson Inc. The programs may be used and/or copied only with written
+permission from Ericsson Inc. or in accordance with the terms and
+conditions stipulated in the agreement/contract under which the
+program(s) have been supplied.
+
+@since:     October 2026
+@summary:   Hardlink snapshots of the yum repositories on the MS,
+            restored incrementally from a manifest of their files, and
+            createrepo runs for several repositories at once.
+"""
+
+# Suffix of the snapshot of a repository.
+BACKUP_SUFFIX = "_bak"
+# Suffix of the marker of a repository which did not exist at backup time.
+NONE_SUFFIX = "_none"
+# Suffix a repository is renamed to while a snapshot takes its place.
+OLD_SUFFIX = "_old"
+# Printed before the manifest of each repository.
+MANIFEST_MARKER = "__REPO_MANIFEST__"
+CREATEREPO_CMD = "/usr/bin/createrepo"
+CREATEREPO_UPDATE_CMD = CREATEREPO_CMD + " --update"
+# createrepo worker processes for each repository.
+CREATEREPO_WORKERS = 2
+
+
+def get_parallel_cmd(scripts):
+    """
+    Description:
+        Get a shell command which runs scripts at the same time and exits
+        with a non-zero code if any of them failed.
+    Args:
+        scripts (list): Shell scripts.
+    Returns:
+        str. The command.
+    """
+    jobs = " ".join("( {0} ) & pids=\"$pids $!\";".format(script)
+                    for script in scripts)
+    return ("fail=0; pids=; {0} for pid in $pids; do wait $pid || fail=1; "
+            "done; exit $fail".format(jobs))
+
+
+def get_snapshot_cmd(src, dest):
+    """
+    Get a command making a hardlink snapshot of a directory, which copies
+    no file data. A file replaced in the directory, as rsync, createrepo
+    and the restore below do, leaves the snapshot unchanged; one written
+    in place would change the snapshot too.
+    """
+    return "/bin/cp -al {0} {1}".format(src, dest)
+
+
+def get_backup_repos_cmd(repo_paths):
+    """
+    Description:
+        Get a command which snapshots every existing repository to
+        '<repo>_bak' and creates '<repo>_none' for the missing ones, all
+        repositories at the same time.
+    Args:
+        repo_paths (list): Repository directories.
+    Returns:
+        str. The command.
+    """
+    scripts = []
+    for repo in repo_paths:
+        repo = repo.rstrip("/")
+        scripts.append(
+            "if [ -d {repo} ]; then /bin/rm -rf {bak} && {snapshot}; "
+            "else /bin/mkdir -p {none}; fi".format(
+                repo=repo, bak=repo + BACKUP_SUFFIX, none=repo + NONE_SUFFIX,
+                snapshot=get_snapshot_cmd(repo, repo + BACKUP_SUFFIX)))
+    return get_parallel_cmd(scripts)
+
+
+def get_restore_repos_cmd(repo_paths):
+    """
+    Description:
+        Get a command which puts back the repositories backed up by
+        get_backup_repos_cmd(), all repositories at the same time. A
+        snapshot replaces its repository by two renames, so the repository
+        path is only missing for an instant, and the replaced repository is
+        deleted afterwards. Repositories which did not exist are removed.
+    Args:
+        repo_paths (list): Repository directories.
+    Returns:
+        str. The command.
+    """
+    scripts = []
+    for repo in repo_paths:
+        repo = repo.rstrip("/")
+        scripts.append(
+            "if [ -d {bak} ]; then /bin/rm -rf {old}; "
+            "if [ -e {repo} ]; then /bin/mv {repo} {old}; fi && "
+            "/bin/mv {bak} {repo} && /bin/rm -rf {old}; "
+            "elif [ -d {none} ]; then /bin/rm -rf {repo} && "
+            "/bin/rmdir {none}; fi".format(
+                repo=repo, bak=repo + BACKUP_SUFFIX, old=repo + OLD_SUFFIX,
+                none=repo + NONE_SUFFIX))
+    return get_parallel_cmd(scripts)
+
+
+def get_manifest_cmd(repo_paths):
+    """
+    Description:
+        Get a command which prints the manifest of repositories: the path,
+        size, modification time and inode of every file outside the
+        repository metadata.
+    Args:
+        repo_paths (list): Repository directories.
+    Returns:
+        str. The command, see parse_manifests() for its output.
+    """
+    cmds = []
+    for repo in repo_paths:
+        repo = repo.rstrip("/")
+        # Missing repositories get no manifest.
+        cmds.append("if [ -d {0} ]; then echo {1} {0}; /bin/find {0} "
+                    "-type f ! -path '{0}/repodata/*' "
+                    "-printf '%P\\t%s\\t%T@\\t%i\\n'; fi"
+                    .format(repo, MANIFEST_MARKER))
+    return "; ".join(cmds)
+
+
+def parse_manifests(output):
+    """
+    Description:
+        Parse the output of get_manifest_cmd().
+    Args:
+        output (list): Lines printed by the command.
+    Returns:
+        dict. For each existing repository, a dict of (size, mtime, inode)
+        keyed by file path relative to the repository.
+    """
+    manifests = {}
+    repo = None
+    for line in output:
+        if line.startswith(MANIFEST_MARKER + " "):
+            repo = line.split(" ", 1)[1]
+            manifests.setdefault(repo, {})
+        elif repo is not None and line:
+            path, size, mtime, inode = line.rsplit("\t", 3)
+            manifests[repo][path] = (int(size), mtime, int(inode))
+    return manifests
+
+
+def diff_manifests(backup, current):
+    """
+    Description:
+        Compare the manifest of a repository at backup time with its
+        current manifest. A file of another size or modification time has
+        changed. A file of the same size and modification time but another
+        inode was replaced, maybe by the same content, and only its hash
+        can tell, see get_incremental_restore_script(). The others are
+        still linked to the snapshot and unchanged.
+    Args:
+        backup (dict): Manifest taken at backup time.
+        current (dict): Current manifest.
+    Returns:
+        tuple. (added, changed, replaced): sorted paths of the files added
+        since the backup, of the files changed or removed since then and
+        of the files replaced with the same size and modification time.
+    """
+    added = sorted(path for path in current if path not in backup)
+    changed = []
+    replaced = []
+    for path, (size, mtime, inode) in sorted(backup.items()):
+        entry = current.get(path)
+        if entry is None or entry[:2] != (size, mtime):
+            changed.append(path)
+        elif entry[2] != inode:
+            replaced.append(path)
+    return added, changed, replaced
+
+
+def get_incremental_restore_script(repo, added, changed, replaced=()):
+    """
+    Get a script which deletes the files added to a repository, copies the
+    changed ones back from its snapshot, and the replaced ones whose
+    sha256 differs from the snapshot, updates the metadata once if
+    anything differed and drops the snapshot.
+    """
+    bak = repo + BACKUP_SUFFIX
+    # Remove each file before copying it back so it is replaced, not
+    # written in place, even if it is still linked to the snapshot.
+    copy_cmd = "cd {0} && /bin/cp -a --remove-destination --parents {{0}} " \
+        "{1}/".format(bak, repo)
+    cmds = ["dirty={0}".format(1 if added or changed else 0)]
+    if added:
+        cmds.append("cd {0} && /bin/rm -f {1}".format(
+            repo, " ".join("'{0}'".format(path) for path in added)))
+    if changed:
+        cmds.append(copy_cmd.format(
+            " ".join("'{0}'".format(path) for path in changed)))
+    for path in replaced:
+        cmds.append(
+            "{{ [ \"$(/usr/bin/sha256sum < '{0}/{2}')\" = "
+            "\"$(/usr/bin/sha256sum < '{1}/{2}')\" ] || "
+            "{{ ( {3} ) && dirty=1; }}; }}".format(
+                repo, bak, path, copy_cmd.format("'{0}'".format(path))))
+    cmds.append("{{ [ $dirty = 0 ] || {0} {1} >/dev/null; }}".format(
+        CREATEREPO_UPDATE_CMD, repo))
+    cmds.append("/bin/rm -rf {0}".format(bak))
+    return " && ".join(cmds)
+
+
+def get_repomd_path(repo):
+    """ Get the path of the metadata index of a repository. """
+    return repo.rstrip("/") + "/repodata/repomd.xml"
+
+
+def get_create_repos_cmd(repo_paths, workers=CREATEREPO_WORKERS):
+    """
+    Description:
+        Get a command which runs createrepo for every repository at the
+        same time, then prints the paths of the metadata indexes found by
+        a single stat call. It exits with a non-zero code if a createrepo
+        failed.
+    Args:
+        repo_paths (list): Repository directories.
+        workers (int): createrepo worker processes for each repository.
+    Returns:
+        str. The command.
+    """
+    create_cmd = get_parallel_cmd(
+        "{0} --workers {1} {2} >/dev/null".format(CREATEREPO_CMD, workers,
+                                                   repo)
+        for repo in repo_paths)
+    return ("( {0} ); rc=$?; /usr/bin/stat -c %n {1} 2>/dev/null; exit $rc"
+            .format(create_cmd, " ".join(get_repomd_path(repo)
+                                         for repo in repo_paths)))
+
+
+def create_repos(test, node, repo_paths, workers=CREATEREPO_WORKERS):
+    """
+    Description:
+        Create the metadata of repositories in one remote command and
+        assert that every repository got its repomd.xml, see
+        get_create_repos_cmd().
+    Args:
+        test (GenericTest): The running test.
+        node (str): Filename of the node holding the repositories.
+        repo_paths (list): Repository directories.
+        workers (int): createrepo worker processes for each repository.
+    """
+    out, err, rc = test.run_command(node,
+                                    get_create_repos_cmd(repo_paths, workers),
+                                    su_root=True, su_timeout_secs=600)
+    test.assertEqual(0, rc, "createrepo failed: {0}".format(err))
+    missing = [get_repomd_path(repo) for repo in repo_paths
+               if get_repomd_path(repo) not in out]
+    test.assertEqual([], missing, "<{0}> not found".format(
+        ", ".join(missing)))
+
+
+def backup_repos(test, node, repo_paths, manifest=False):
+    """
+    Description:
+        Snapshot yum repositories, see get_backup_repos_cmd().
+    Args:
+        test (GenericTest): The running test.
+        node (str): Filename of the node holding the repositories.
+        repo_paths (list): Repository directories.
+        manifest (bool): If True also read the manifest of the
+                         repositories so they can be restored
+                         incrementally.
+    Returns:
+        dict. Manifest keyed by repository, see parse_manifests(), empty
+        if manifest is False. Missing repositories are left out.
+    """
+    out, _, _ = test.run_command(node, get_backup_repos_cmd(repo_paths),
+                                 su_root=True, su_timeout_secs=600,
+                                 default_asserts=True)
+    test.assertEqual([], out)
+    if not manifest:
+        return {}
+
+    out, _, _ = test.run_command(node, get_manifest_cmd(repo_paths),
+                                 su_root=True, su_timeout_secs=600,
+                                 default_asserts=True)
+    return parse_manifests(out)
+
+
+def restore_repos(test, node, repo_paths, manifests=None):
+    """
+    Description:
+        Put back the repositories backed up by backup_repos(). Repositories
+        with a manifest are restored incrementally: the current manifests
+        are read in one command and compared locally with those of the
+        backup, then only the added and changed files are handled, see
+        get_incremental_restore_script(). The others are restored from
+        their snapshot, see get_restore_repos_cmd().
+        Errors are logged rather than asserted as this runs in the cleanup
+        of tests.
+    Args:
+        test (GenericTest): The running test.
+        node (str): Filename of the node holding the repositories.
+        repo_paths (list): Repository directories.
+        manifests (dict): Manifests returned by backup_repos().
+    """
+    manifests = manifests or {}
+    repo_paths = [repo.rstrip("/") for repo in repo_paths]
+    incremental = [repo for repo in repo_paths if repo in manifests]
+    scripts = []
+    if incremental:
+        out, _, _ = test.run_command(
+            node, get_manifest_cmd(incremental),
+            su_root=True, su_timeout_secs=600)
+        current = parse_manifests(out)
+        for repo in incremental:
+            if repo not in current:
+                # The repository was removed, put all of it back.
+                scripts.append(get_restore_repos_cmd([repo]))
+                continue
+            added, changed, replaced = diff_manifests(manifests[repo],
+                                                      current[repo])
+            test.log("info", "{0}: {1} files added, {2} changed or removed, "
+                     "{3} replaced".format(repo, len(added), len(changed),
+                                           len(replaced)))
+            scripts.append(get_incremental_restore_script(
+                repo, added, changed, replaced))
+    other_repos = [repo for repo in repo_paths if repo not in incremental]
+    if other_repos:
+        scripts.append(get_restore_repos_cmd(other_repos))
+
+    _, err, rc = test.run_command(node, get_parallel_cmd(scripts),
+                                  su_root=True, su_timeout_secs=600)
+    if rc != 0:
+        test.log("info", "Restore of {0} failed: {1}"
+                 .format(", ".join(repo_paths), err))
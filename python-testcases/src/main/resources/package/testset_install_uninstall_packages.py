@@ -18,9 +18,12 @@ from litp_generic_test import GenericTest, attr
 from litp_cli_utils import CLIUtils
 from redhat_cmd_utils import RHCmdUtils
 import test_constants
+from package_utils import ModelCacheMixin
+from plan_utils import PlanMonitorMixin
+import node_utils
 
 
-class InstallUninstallPkg(GenericTest):
+class InstallUninstallPkg(ModelCacheMixin, PlanMonitorMixin, GenericTest):
 
     """
     Description:
@@ -48,6 +51,10 @@ class InstallUninstallPkg(GenericTest):
         self.redhat = RHCmdUtils()
         self.cli = CLIUtils()
         self.timeout_mins = 50
+        # Stop waiting for a plan as soon as it fails or stalls rather than
+        # for the whole timeout.
+        self.plan_fail_fast = True
+        self.plan_stall_mins = 15
 
         # Get all software-items
         self.items_path = self.find(self.ms_node, "/software",
@@ -204,7 +211,9 @@ class InstallUninstallPkg(GenericTest):
             self.wait_for_plan_state(self.ms_node,
                                      test_constants.PLAN_COMPLETE,
                                      self.timeout_mins)
-        self.assertTrue(completed_successfully, "Plan was not successful")
+        self.assertTrue(completed_successfully,
+                        "Plan was not successful: {0}"
+                        .format(self.get_plan_failure()))
 
         self.log("info", "# 5. Check that 'telnet' rpm package was not" + \
                  " installed on peer nodes")
@@ -244,19 +253,26 @@ class InstallUninstallPkg(GenericTest):
             self.wait_for_plan_state(self.ms_node,
                                      test_constants.PLAN_COMPLETE,
                                      self.timeout_mins)
-        self.assertTrue(completed_successfully, "Plan was not successful")
+        self.assertTrue(completed_successfully,
+                        "Plan was not successful: {0}"
+                        .format(self.get_plan_failure()))
 
         self.log("info", "# 9. Check package 'wireshark' was successfully" + \
                  " installed on nodes")
-        # Check that the new rpm package was installed on peer nodes
-        cmd = self.redhat.check_pkg_installed([self.wireshark_pkg])
+        # Check that the new rpm package was installed on peer nodes, and
+        # read the state of 'zsh' in the same round trip for step 10
+        installed = dict(
+            (node, node_utils.query_node(self, node, [
+                {"query": "pkgs_installed",
+                 "packages": [self.wireshark_pkg, self.zsh_pkg]}])[0])
+            for node in self.mn_nodes)
         for node in self.mn_nodes:
-            self.run_command(node, cmd, default_asserts=True)
+            self.assertTrue(installed[node][self.wireshark_pkg])
 
         self.log("info", "# 10. Check package 'zsh' was successfully" + \
                  " removed from nodes")
         for node in self.mn_nodes:
-            self.assertFalse(self.check_pkgs_installed(node, [self.zsh_pkg]))
+            self.assertFalse(installed[node][self.zsh_pkg])
 
         self.log("info", "# 11. Remove an inherit source package-list.")
         self.execute_cli_remove_cmd(self.ms_node,
@@ -268,8 +284,10 @@ class InstallUninstallPkg(GenericTest):
         self.log("info", "# 12. Check package 'dstat' was successfully" + \
                  " removed from nodes")
         for node in self.mn_nodes:
-            self.assertFalse(self.check_pkgs_installed(node,
-                                                       [self.dstat_pkg]))
+            installed = node_utils.query_node(self, node, [
+                {"query": "pkgs_installed",
+                 "packages": [self.dstat_pkg]}])[0]
+            self.assertFalse(installed[self.dstat_pkg])
 
         self.log("info", "# 13. Run remove command against an existing" + \
                  " package list.")
@@ -301,4 +319,6 @@ class InstallUninstallPkg(GenericTest):
             self.wait_for_plan_state(self.ms_node,
                                      test_constants.PLAN_COMPLETE,
                                      self.timeout_mins)
-        self.assertTrue(completed_successfully, "Plan was not successful")
+        self.assertTrue(completed_successfully,
+                        "Plan was not successful: {0}"
+                        .format(self.get_plan_failure()))
@@ -16,9 +16,13 @@ from litp_generic_test import GenericTest, attr
 import test_constants
 from redhat_cmd_utils import RHCmdUtils
 import os
+from package_utils import PackageInventoryMixin, ModelCacheMixin
+from plan_utils import PlanMonitorMixin
+import cmd_utils
 
 
-class Story10123(GenericTest):
+class Story10123(PackageInventoryMixin, ModelCacheMixin,
+                 PlanMonitorMixin, GenericTest):
     """
     As an ENM user I want a FOSS rsyslog 8.4.1 (or later) installed so I use
     elasticsearch in my 15B deployment.
@@ -181,13 +185,11 @@ class Story10123(GenericTest):
                 self.assertFalse(self.check_pkgs_installed(node,
                     ['EXTR-lsbwrapper5-3.0.0-1.noarch']))
         finally:
-            for rpm in list_of_lsb_rpms:
-                self.run_command(self.ms_node,
-                                 "/bin/rm -rf {0}/{1}".format(
-                                                    self.repo_dir_3pp, rpm),
-                                 add_to_cleanup=False, su_root=True)
-            _, _, rcode = self.run_command(
-            self.ms_node, self.rh_os.get_createrepo_cmd(self.repo_dir_3pp),
-            su_root=True
-            )
+            # Remove the rpms and update the repo in a single exec and su.
+            cmds = ["/bin/rm -rf {0}/{1}".format(self.repo_dir_3pp, rpm)
+                    for rpm in list_of_lsb_rpms]
+            cmds.append(self.rh_os.get_createrepo_cmd(self.repo_dir_3pp))
+            results = cmd_utils.run_pipelined(self, self.ms_node, cmds,
+                                              su_root=True)
+            _, _, rcode = results[-1]
             self.assertEqual(0, rcode)
@@ -21,9 +21,15 @@ from litp_generic_test import GenericTest, attr
 from litp_cli_utils import CLIUtils
 from redhat_cmd_utils import RHCmdUtils
 import test_constants
+import package_utils
+import plan_utils
+from package_utils import PackageInventoryMixin, ModelCacheMixin
+from plan_utils import PlanMonitorMixin
+from log_utils import LogCursor
 
 
-class Story2093(GenericTest):
+class Story2093(PackageInventoryMixin, ModelCacheMixin,
+                PlanMonitorMixin, GenericTest):
     """
     As a LITP User I want to upgrade RHEL & 3pps on the nodes so that I can
     apply security patches.
@@ -57,14 +63,22 @@ class Story2093(GenericTest):
         """Runs for every test"""
         super(Story2093, self).tearDown()
 
-    def _install_test_rpms(self, nodes, rpms):
-        """ Install rpm packages on a nodes. """
+    def _install_test_rpms(self, nodes, rpms, parallel=True, batch=True):
+        """
+        Install rpm packages on a nodes.
 
-        for node in nodes:
+        If parallel is True the nodes are staged and installed at the same
+        time and the failures of all nodes are reported together.
+        If batch is True all rpms are installed in a single rpm transaction
+        per node, otherwise one rpm command is run for each rpm.
+        """
+        rpm_local_dir = os.path.dirname(__file__)
+        rpm_remot_dir = '/tmp/story2093/'
+
+        def install_on_node(node):
+            """ Copy the rpm package files to a node and install them. """
             # 1. Copy rpm package files to node
             filelist = []
-            rpm_local_dir = os.path.dirname(__file__)
-            rpm_remot_dir = '/tmp/story2093/'
             for rpm_file in rpms:
                 rpms_local_path = os.path.join(rpm_local_dir, rpm_file)
                 rpms_remot_path = os.path.join(rpm_remot_dir, rpm_file)
@@ -75,6 +89,11 @@ class Story2093(GenericTest):
             self.assertTrue(self.copy_filelist_to(node, filelist))
 
             # 2. Install rpm packages.
+            if batch:
+                self._install_rpms_in_one_transaction(
+                    node, [rpm_remot_dir + rpm for rpm in rpms])
+                return
+
             for rpm in rpms:
                 cmd = "/bin/rpm -ivh {0}".format(rpm_remot_dir + rpm)
                 _, err, ret_code = self.run_command(node,
@@ -83,6 +102,34 @@ class Story2093(GenericTest):
                 self.assertEqual(0, ret_code)
                 self.assertEqual([], err)
 
+        if not parallel:
+            for node in nodes:
+                install_on_node(node)
+            return
+
+        _, errors = package_utils.run_on_nodes(install_on_node, nodes)
+        self.assertEqual({}, errors,
+                         "Failed to install test rpms:\n{0}"
+                         .format(package_utils.format_node_errors(errors)))
+
+    def _install_rpms_in_one_transaction(self, node, rpm_paths):
+        """
+        Install rpm files already copied to a node with a single rpm
+        command. On failure the rpm errors are reported per package.
+        """
+        cmd = package_utils.get_rpm_install_cmd(rpm_paths)
+        out, err, ret_code = self.run_command(node, cmd, su_root=True)
+        if ret_code == 0 and err == []:
+            return
+
+        pkg_errors = package_utils.parse_rpm_install_errors(out + err,
+                                                            rpm_paths)
+        details = ["{0}: {1}".format(rpm or "unknown package",
+                                     "; ".join(pkg_errors[rpm]))
+                   for rpm in sorted(pkg_errors)]
+        self.fail("rpm install failed on {0} (rc={1}):\n{2}"
+                  .format(node, ret_code, "\n".join(details or err)))
+
     def _import_rpms(self, rpms):
         """
         Description:
@@ -91,40 +138,18 @@ class Story2093(GenericTest):
             is installed so we support with and without kernel packages.
         Actions:
             1. Select RPM packages to upgrade.
-            2. Create a directory for rpms
-            3. Copy RPMs into /tmp on the MS.
-            4. Import RPMs with LITP import cmd into update repo.
+            2. Copy RPMs into a staging directory on the MS.
+            3. Import the directory with LITP import cmd into update repo.
+            See package_utils.import_rpms().
         """
-        rpms_local_paths = []
-        rpms_remote_paths = []
-        rpm_remote_dir = '/tmp/story2093/'
-        for rpm in rpms:
-            rpms_local_paths.append(os.path.join(os.path.dirname(__file__),
-                                                 rpm)
-                                    )
-
-            rpms_remote_paths.append(os.path.join(rpm_remote_dir,
-                                                  rpm)
-                                     )
-
         # 1. Select RPM packages to upgrade.
-        ms_rpm_paths = rpms_remote_paths
-        local_file_paths = rpms_local_paths
+        local_file_paths = [os.path.join(os.path.dirname(__file__), rpm)
+                            for rpm in rpms]
 
-        # 2. Create a directory for rpms
-        self.create_dir_on_node(self.ms_node, rpm_remote_dir)
-
-        # 3. Copy RPMs into /tmp on the ms
-        for loc_path in local_file_paths:
-            self.assertTrue(self.copy_file_to(self.ms_node,
-                                              loc_path,
-                                              rpm_remote_dir))
-
-        # 4. Import them with LITP import cmd into update repo
-        for rpm in ms_rpm_paths:
-            self.execute_cli_import_cmd(self.ms_node,
-                                        rpm,
-                                        test_constants.OS_UPDATES_PATH_RHEL7)
+        # 2. & 3. Copy and import them
+        package_utils.import_rpms(self, self.ms_node, local_file_paths,
+                                  test_constants.OS_UPDATES_PATH_RHEL7,
+                                  '/tmp/story2093/rpm_to_import')
 
     def _verify_test_pkgs_removed(self, nodes):
         """ Verify test packages removed"""
@@ -140,24 +165,17 @@ class Story2093(GenericTest):
     def _verify_packages_upgraded(self, nodes, rpm_list, expect_positive=True):
         """
         Check if packages are installed.
+        The packages of each node are read once, see PackageInventory.
         """
         for node in nodes:
             for rpm_file in rpm_list:
                 # Remove '.rpm' file extension
                 rpm = rpm_file.split(".rpm")[0]
 
-                # Get command to check install state.
-                cmd = RHCmdUtils.check_pkg_installed([rpm])
-
-                # Run command to check install
-                out, err, ret_code = self.run_command(node, cmd)
-
-                self.assertFalse(err)
-                self.assertEqual(0, ret_code)
-                if expect_positive:
-                    self.assertEqual(out[0], rpm)
-                else:
-                    self.assertEqual(out, [])
+                self.assertEqual(expect_positive,
+                                 self.pkg_inventory.is_installed(node, rpm),
+                                 "Unexpected install state of {0} on {1}"
+                                 .format(rpm, node))
 
     def _cleanup_repos(self, nodes, rpm_list, repo_path):
         """
@@ -166,65 +184,35 @@ class Story2093(GenericTest):
             1. Remove RPMs from the yum repository on MS.
             2. Update the yum repository.
             3. Clean the yum cache so queries will use actual repo contents.
-            4. Verify on MS, that new rpms are not available".
-            5. Uninstall test packages
+            4. Uninstall test packages
+            5. Verify on MS, that new rpms are not available".
+            6. Verify test packages are not on the nodes.
+        Steps 1-4 are batched, see package_utils.cleanup_test_repo().
         """
         all_nodes = nodes + [self.ms_node]
 
-        # 1. Remove RPMs from the yum repository on MS.
-        for rpm in rpm_list:
-            self.log("info", "Removing: {0} from the repo: {1}"
-                     .format(rpm, repo_path))
-            repo_to_rm = repo_path + '/' + rpm
-            self.assertTrue(self.remove_item(self.ms_node,
-                                             repo_to_rm,
-                                             su_root=True))
-
-        # 2. Update the yum repository.
-        cmd = "/usr/bin/createrepo --update " + repo_path
-        _, err, ret_code = self.run_command(self.ms_node,
-                                            cmd,
-                                            su_root=True,
-                                            su_timeout_secs=120)
-        self.assertEqual(0, ret_code)
-        self.assertFalse(err)
-
-        # 3. Clean the yum cache.
-        cmd = self.rhcmd.get_yum_cmd("clean all")
-        for node in all_nodes:
-            _, err, ret_code = self.run_command(node, cmd, su_root=True)
-            self.assertEqual(0, ret_code)
-            self.assertFalse(err)
-
-        # 4. Verify on ms, that new rpms are not available.
-        self.assertFalse(self._are_rpms_available(all_nodes, rpm_list))
+        # 1-4. Clean the repo, yum caches and test packages.
+        package_utils.cleanup_test_repo(self, self.ms_node, nodes, rpm_list,
+                                        repo_path, self.test_pkgs)
 
-        # 5. Uninstall test packages
-        for node in nodes:
-            for package in self.test_pkgs:
-                cmd = "/bin/rpm -e " + package
-                _, err, ret_code = self.run_command(node, cmd, su_root=True)
-                self.assertTrue(ret_code in [0, 1])
+        # 5. Verify on ms, that new rpms are not available.
+        availability = self._are_rpms_available(all_nodes, rpm_list)
+        available = ["{0} on {1}".format(rpm, node)
+                     for node in sorted(availability)
+                     for rpm in rpm_list if availability[node][rpm]]
+        self.assertEqual([], available)
 
         # 6. Verify test packages are not on the nodes.
         self._verify_test_pkgs_removed(nodes)
 
     def _are_rpms_available(self, node_list, rpms_list):
-        """ Check if rpms are available on nodes."""
-        _rpm_availability_list = []
-        for node in node_list:
-            for rpm in rpms_list:
-                cmd = ("repoquery -q --qf "
-                    "'%{name}-%{version}-%{release}.%{arch}' " + rpm)
-                out, err, ret_code = self.run_command(node,
-                                                      cmd,
-                                                      su_root=True)
-                self.assertFalse(err)
-                self.assertEqual(0, ret_code)
-                result = self.is_text_in_list(rpm, out)
-                _rpm_availability_list.append(result)
+        """ Check if rpms are available on nodes.
 
-        return "False" in _rpm_availability_list
+        Returns a dict with, for each node, a dict that maps each rpm to
+        True if it is available on the node.
+        """
+        return package_utils.get_rpms_availability(self, node_list,
+                                                   rpms_list)
 
     def _add_upg_item(self, item):
         """ Add an upgrade item at a path. """
@@ -238,15 +226,14 @@ class Story2093(GenericTest):
 
     def _remove_upgrade_items_from_model(self, nodes):
         """Remove an upgrade item from a node"""
-        upg_state = []
         for node in nodes:
             node_url = self.get_node_url_from_filename(self.ms_node, node)
             upg_url = node_url + "/upgrade"
             remove_cmd = self.cli.get_remove_cmd(upg_url)
             self.run_command(self.ms_node, remove_cmd)
-            upg_state.append(self._get_nodes_upgrade_state(node))
 
-        if "ForRemoval" in upg_state:
+        upg_states = self._get_upgrade_states()
+        if "ForRemoval" in [upg_states.get(node) for node in nodes]:
             self.log("info", "Removing upgrade items")
             # Run 'litp create_plan'.
             self.execute_cli_createplan_cmd(self.ms_node)
@@ -258,22 +245,11 @@ class Story2093(GenericTest):
             self.assertTrue(self.wait_for_plan_state(self.ms_node,
                 test_constants.PLAN_COMPLETE, self.plan_timeout_mins))
 
-    def _get_nodes_upgrade_state(self, node):
-        """ Get the state of a node's upgrade item.
-            Returns False if upgrade doesn't exist
+    def _get_upgrade_states(self):
+        """ Get the state of the upgrade item of every node, keyed by node.
+            Nodes without an upgrade item are left out.
         """
-        upg_url = self.get_node_url_from_filename(self.ms_node, node) \
-            + "/upgrade"
-
-        #Get a cmd which finds the 'state' value of the returned ip range path
-        get_data_cmd = self.cli.get_show_data_value_cmd(upg_url,
-                                                    "state")
-        #Now we run the passed command, the state value is output to stdout
-        stdout, _, _ = self.run_command(self.ms_node, get_data_cmd)
-        if stdout:
-            return stdout[0]
-        else:
-            return False
+        return package_utils.get_upgrade_states(self, self.ms_node)
 
     def _dummy_yum(self, node):
         """ Dummy the yum command on a node."""
@@ -457,15 +433,12 @@ class Story2093(GenericTest):
             self.execute_cli_createplan_cmd(self.ms_node)
 
             # 13. Verify that there are no tasks for the successful node.
-            plan, _, _ = self.execute_cli_showplan_cmd(self.ms_node)
-            plan_dict = self.cli.parse_plan_output(plan)
-
-            hostname = self.get_node_att(successful_node, "hostname")
-            for _, phase in plan_dict.items():
-                for _, task in phase.items():
-                    self.assertFalse(hostname in task["DESC"])
-                    self.log("info", "{0} is not in task {1}"
-                             .format(hostname, task["DESC"]))
+            plan = plan_utils.get_plan(self, self.ms_node)
+
+            hostname = self.get_node_hostname(self.ms_node, successful_node)
+            self.assertEqual([], plan.tasks_for_hostname(hostname))
+            self.log("info", "{0} is not in any of the {1} tasks"
+                     .format(hostname, len(plan)))
         finally:
             # 14. Revert the dummy yum.
             self._fix_yum(fail_node)
@@ -505,6 +478,7 @@ class Story2093(GenericTest):
         upg_rpms = [self.upg_rpms[0], self.upg_rpms[2]]
 
         node = self.mn_nodes[0]
+        log_cursor = LogCursor(self, self.ms_node)
         try:
             self.log('info', "Install packages on node.")
             self._install_test_rpms([node], self.orig_rpms[0:3])
@@ -526,7 +500,8 @@ class Story2093(GenericTest):
             expected_msg = ("{0} failed with message: Error: Package: {1}"
                             .format(hostname, upg_rpms[1].split(".rpm")[0]))
 
-            self.assertTrue(self.wait_for_log_msg(self.ms_node, expected_msg))
+            result = log_cursor.wait_for_all([expected_msg])
+            self.assertTrue(result.success, str(result))
 
             self.log('info',
             "Verify that the package cannot be upgraded and the plan fails.")
@@ -638,7 +613,8 @@ class Story2093(GenericTest):
 
         node = self.mn_nodes[0]
         log_path = test_constants.GEN_SYSTEM_LOG_PATH
-        log_len = self.get_file_len(self.ms_node, log_path)
+        log_cursor = LogCursor(self, self.ms_node, log_path,
+                               test_constants.LOGROTATED_SYSLOG_FILE1)
         try:
             # 2. Import version 1.0 rpms into the repository.
             self._import_rpms(orig_rpms)
@@ -681,10 +657,7 @@ class Story2093(GenericTest):
 
             # 14. Verify that an appropriate error message is logged.
             expect_msg = "Requires: world = 1.1"
-            log_msg = self.wait_for_log_msg(self.ms_node, expect_msg,
-                                            log_file=log_path,
-                                            log_len=log_len,
-                          rotated_log=test_constants.LOGROTATED_SYSLOG_FILE1)
+            log_msg = log_cursor.wait_for(expect_msg)
 
             self.assertTrue(log_msg, 'Expected Error message is missing in {0}'
                             .format(log_path))
@@ -766,18 +739,12 @@ class Story2093(GenericTest):
             self.execute_cli_createplan_cmd(self.ms_node)
 
             # 10. Verify that there is no upgrade for the first node.
-            self.execute_cli_showplan_cmd(self.ms_node)
-
-            plan, _, _ = self.execute_cli_showplan_cmd(self.ms_node)
-            plan_dict = self.cli.parse_plan_output(plan)
-
-            for _, phase in plan_dict.items():
-                for _, task in phase.items():
-                    self.assertFalse(self.is_text_in_list(node_hostname,
-                                     task["DESC"]))
+            plan = plan_utils.get_plan(self, self.ms_node)
 
-                    self.log("info", "No upgrade task for {0} in task {1}"
-                             .format(node_hostname, task["DESC"]))
+            self.assertEqual([], plan.tasks_for_hostname(node_hostname))
+            self.assertEqual([], plan.find(node_hostname))
+            self.log("info", "No upgrade task for {0} in the {1} tasks"
+                     .format(node_hostname, len(plan)))
 
         finally:
             # 11. Revert to original package and remove new rpm from repo.
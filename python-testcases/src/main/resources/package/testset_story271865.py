@@ -17,14 +17,32 @@ from litp_generic_test import GenericTest, attr
 import test_constants
 from redhat_cmd_utils import RHCmdUtils
 import time
+from package_utils import ModelCacheMixin
+from plan_utils import PlanMonitorMixin
+import node_utils
+import cmd_utils
+import package_utils
+from puppet_utils import PuppetWatcher
 
 
-class Story271865(GenericTest):
+class Story271865(ModelCacheMixin, PlanMonitorMixin, GenericTest):
     """
     TORF-271865
     LITP marks the node reboot as successful as soon as puppet on that node is
     running without waiting for completion of the Puppet catalog run.
     """
+    # Number of upgrade and reboot cycles test_04 times, and the
+    # percentile of the puppet running to reboot task success gaps which
+    # must be under the threshold. The p80 gate is separate from the
+    # p50/p95/max reported, a p95 of 5 samples is close to their maximum.
+    # Puppet running is the exact systemd start of the service, not the
+    # catalog run completion, as the story is about LITP not waiting for
+    # the catalog run. It is earlier than the first successful poll of the
+    # service status the 40s threshold was set against, so the same
+    # threshold is slightly stricter.
+    reboot_cycles = 5
+    gap_percentile = 80
+    gap_threshold_secs = 40
 
     def setUp(self):
         """ Setup variables for every test """
@@ -84,6 +102,8 @@ class Story271865(GenericTest):
             This test will verify that the reboot node phase of a plan will be
             marked as a success as soon as puppet is running on that node
             without waiting for completion of the Puppet catalog run.
+            The upgrade and reboot is timed reboot_cycles times and the
+            gap is checked at a percentile, not on a single sample.
         @tms_test_steps:
             @step: Importing dummy test RPMS to MS.
             @result: dummy test RPMS imported to MS.
@@ -112,9 +132,13 @@ class Story271865(GenericTest):
             @step: Watch node reboot phase till it is labeled successful.
             @result: reboot node phase was watched until phase was marked
                     successful.
+            @step: Downgrade the dummy package on the node and repeat the
+                   upgrade, for reboot_cycles cycles
+            @result: Every cycle was timed
             @step: Compare reboot time to puppet times
-            @result: Time between puppet starting and the nodes successful
-                    reboot was compared.
+            @result: The gap_percentile of the times between puppet
+                    starting and the nodes successful reboot was under
+                    gap_threshold_secs.
         @tms_test_precondition:NA
         @tms_execution_type: Automated
         """
@@ -155,6 +179,44 @@ class Story271865(GenericTest):
                                 test_constants.PLAN_COMPLETE,
                                 6)
 
+        gaps = []
+        reboot_times = []
+        for cycle in range(1, self.reboot_cycles + 1):
+            self.log("info", "Upgrade and reboot cycle {0} of {1}"
+                     .format(cycle, self.reboot_cycles))
+            if cycle > 1:
+                self._downgrade_dummy_package()
+            gap, reboot_time = self._upgrade_with_reboot()
+            gaps.append(gap)
+            reboot_times.append(reboot_time)
+
+        self.log("info", "Step 12. compare reboot time to puppet times. ")
+        self.log("info", package_utils.format_distribution(
+            "Gap between puppet running and reboot node task success", gaps))
+        self.log("info", package_utils.format_distribution(
+            "Reboot node task time", reboot_times))
+        gap = package_utils.get_percentile(gaps, self.gap_percentile)
+        self.log("info", "p{0} gap: {1:.1f}s, threshold {2}s".format(
+            self.gap_percentile, gap, self.gap_threshold_secs))
+        self.assertTrue(gap < self.gap_threshold_secs,
+                        "p{0} gap of {1:.1f}s between puppet running and "
+                        "reboot node task completion, over {2}s, gaps: "
+                        "{3}".format(
+                            self.gap_percentile, gap,
+                            self.gap_threshold_secs,
+                            ", ".join("{0:.1f}s".format(cycle_gap)
+                                      for cycle_gap in gaps)))
+
+    def _upgrade_with_reboot(self):
+        """
+        Description:
+            Upgrade the dummy package to the version which needs a reboot
+            and time the reboot node task against puppet starting.
+        Returns:
+            tuple. Seconds from puppet running to the reboot node task
+                   success and from the reboot node task start to its
+                   success.
+        """
         self.log("info", "Step 5. import dummy TO package")
         self.execute_cli_import_cmd(self.ms_node,
                                     "{0}{1}".format(self.rpm_remote_dir,
@@ -180,34 +242,26 @@ class Story271865(GenericTest):
             self.wait_for_task_state(self.ms_node, "Reboot node",
                                      expected_state=test_constants.
                                      PLAN_TASKS_RUNNING)
+            reboot_start_time = time.time()
 
             self.wait_for_ping(self.pn_ip, False)
+            # Reconnect in the background while the node boots.
+            pool = node_utils.NodeConnectionPool(self)
+            pool.reconnect([self.primary_node])
 
             self.log("info", "Step 10. wait for puppet to be running")
-            puppet_success_time = timeout = 0
-            puppet_running = waiting_for_node = False
-
-            while puppet_running is not True and timeout < 300:
-                while waiting_for_node is False:
-                    waiting_for_node = self.wait_for_node_up(self.primary_node)
-
-                puppet_status, _, _ = self.get_service_status(
-                                                        self.primary_node,
-                                                        "puppet",
-                                                        assert_running=False)
-
-                puppet_running = self.is_text_in_list("active",
-                                                      puppet_status)
-
-                if puppet_running:
-                    puppet_success_time = time.time()
-                    break
-                timeout += 1
-                time.sleep(2)
+            self.assertTrue(pool.wait_ready([self.primary_node]),
+                            str(pool.readiness(self.primary_node)))
+            # The watcher reads when puppet started on the node itself, so
+            # it runs in the background while the reboot task is watched.
+            # It goes on until the first catalog run completes so the run
+            # is timed too, the gap only uses the service start.
+            puppet_watcher = PuppetWatcher(
+                self, self.primary_node, until="catalog_end").start()
 
             self.log("info", "Step 11. wait for node reboot phase to be "
                              "labeled successful")
-            reboot_success_time, time_diff = 0, 0
+            reboot_success_time = 0
 
             if self.get_current_plan_state(self.ms_node) == \
                     test_constants.PLAN_COMPLETE:
@@ -220,27 +274,45 @@ class Story271865(GenericTest):
 
                 self.execute_cli_showplan_cmd(self.ms_node)
 
-            self.log("info", "Step 12. compare reboot time to puppet times. ")
-            if reboot_success_time and puppet_success_time:
-                time_diff = reboot_success_time - puppet_success_time
-
-                self.assertTrue(time_diff < 40, "Greater then 40 second gap "
-                                                "between puppet running and"
-                                                "reboot node task completion.")
-            else:
-                self.log("info",
-                         "Invalid timers: reboot-success-time {0} and/or "
-                         "puppet-success-time {1}".format(
-                             reboot_success_time, puppet_success_time))
-                self.assertTrue(False, "Test failure")
+            puppet_run = puppet_watcher.wait()
+            puppet_success_time = puppet_run.ready if puppet_run else 0
+            self.assertTrue(reboot_success_time and puppet_success_time,
+                            "Invalid timers: reboot-success-time {0} and/or "
+                            "puppet-success-time {1}".format(
+                                reboot_success_time, puppet_success_time))
 
+            time_diff = reboot_success_time - puppet_success_time
             self.log("info",
                      "Reboot success time: {0}, puppet success time: {1}, "
-                     "difference: {2}, threshold: 40".format(
+                     "difference: {2}".format(
                          reboot_success_time, puppet_success_time, time_diff))
+            return time_diff, reboot_success_time - reboot_start_time
 
         finally:
             self.assertTrue(self.wait_for_plan_state(
                 self.ms_node,
                 test_constants.PLAN_COMPLETE
             ))
+
+    def _downgrade_dummy_package(self):
+        """
+        Description:
+            Put the node back on the version of the dummy package from
+            before the upgrade, so that the upgrade can be run again.
+        """
+        self.log("info", "Downgrade the dummy package on the node")
+        results = cmd_utils.run_pipelined(
+            self, self.ms_node,
+            ["/bin/rm -f {0}/{1}".format(self.repo_dir_3pp,
+                                         self.dummy_lsb_rpms[1]),
+             self.rhcmd.get_createrepo_cmd(self.repo_dir_3pp, ".", False)],
+            su_root=True)
+        results.extend(cmd_utils.run_pipelined(
+            self, self.primary_node,
+            [self.rhcmd.get_yum_cmd("clean all"),
+             self.rhcmd.get_yum_cmd("-y downgrade {0}".format(
+                 self.dummy_lsb_rpms[0][:-len(".rpm")]))],
+            su_root=True))
+        self.assertEqual([0] * len(results),
+                         [ret_code for _, _, ret_code in results],
+                         str(results))
@@ -26,15 +26,22 @@ program(s) have been supplied.
 from litp_generic_test import GenericTest, attr
 from litp_cli_utils import CLIUtils
 import os
-import sys
-import socket
-import exceptions
+import re
 from redhat_cmd_utils import RHCmdUtils
-from time import sleep
 import test_constants
-
-
-class Story9532(GenericTest):
+import package_utils
+import plan_utils
+from package_utils import PackageInventoryMixin, ModelCacheMixin
+from plan_utils import PlanMonitorMixin
+import node_utils
+import fixture_utils
+import repo_utils
+import cmd_utils
+from log_utils import LogCursor
+
+
+class Story9532(PackageInventoryMixin, ModelCacheMixin,
+                PlanMonitorMixin, GenericTest):
     """
     Description:
         I want the contents of my LITP compliant ISO to be imported.
@@ -64,6 +71,8 @@ class Story9532(GenericTest):
                           "popcorn-kernel-1.0-1.el6.x86_64.rpm"]
 
         self.plan_timeout_mins = 10
+        # Manifests of the repos backed up by _backup_repos(), by repo path.
+        self.repo_manifests = {}
 
     def tearDown(self):
         """ Called after every test"""
@@ -76,6 +85,8 @@ class Story9532(GenericTest):
         self.log("info", "a. Mount an ISO")
         self._mount_image(iso_image_id)
 
+        log_cursor = LogCursor(self, self.ms_node)
+
         self.log("info", "b. Call 'litp import_iso' on a directory.")
         self.execute_cli_import_iso_cmd(self.ms_node, iso_path)
 
@@ -83,8 +94,12 @@ class Story9532(GenericTest):
         self.assertTrue(self._litp_in_mmode())
 
         self.log("info", "d. Wait for import to complete.")
-        self.assertTrue(self.wait_for_log_msg(self.ms_node,
-            "ISO Importer is finished, exiting with 0"))
+        result = log_cursor.wait_for_all(
+            ["ISO Importer is finished, exiting with 0"],
+            failure_patterns=[re.compile(
+                "ISO Importer is finished, exiting with [1-9]")],
+            timeout_secs=self.plan_timeout_mins * 60)
+        self.assertTrue(result.success, str(result))
 
         self.log("info", "e. Verify that litp is no longer in mmode.")
         self.assertFalse(self._litp_in_mmode())
@@ -159,13 +174,13 @@ class Story9532(GenericTest):
             self.execute_cli_createplan_cmd(self.ms_node)
 
             # Get current position in log messages before run plan
-            log_path = test_constants.GEN_SYSTEM_LOG_PATH
-            prev_log_pos = self.get_file_len(self.ms_node, log_path)
+            log_cursor = LogCursor(self, self.ms_node)
 
             self.log("info", "e. Verify that there is only one upgrade task"
                 " for node")
+            plan = plan_utils.get_plan(self, self.ms_node)
             for node in upd_nodes:
-                self._verify_update_task(node)
+                self._verify_update_task(node, plan)
 
             self.log("info", "g. Run 'litp run_plan'.")
             self.execute_cli_runplan_cmd(self.ms_node)
@@ -186,21 +201,12 @@ class Story9532(GenericTest):
             # Checking for message in logs: TC10
             #
             self.log("info", "k. Verify log message for upgrade task")
-            for node in upd_nodes:
-                expected_msg = "A command to upgrade the system will be run "\
-                    "on node \\\"{0}\\\". To check the result of this "\
-                    "operation log onto the node and run the command 'yum "\
-                    "history info'".format(node)
-                curr_log_pos = self.get_file_len(self.ms_node, log_path)
-                test_logs_len = curr_log_pos - prev_log_pos
-
-                cmd = self.rhcmd.get_grep_file_cmd(log_path,
-                                               expected_msg,
-                                               file_access_cmd="tail -n {0}"
-                                               .format(test_logs_len))
-                out, _, _ = self.run_command(self.ms_node, cmd,
-                    default_asserts=True)
-                self.assertNotEqual([], out)
+            expected_msgs = ["A command to upgrade the system will be run "
+                "on node \"{0}\". To check the result of this "
+                "operation log onto the node and run the command 'yum "
+                "history info'".format(node) for node in upd_nodes]
+            result = log_cursor.wait_for_all(expected_msgs)
+            self.assertEqual([], result.missing, str(result))
 
     def _mount_image(self, iso_id, as_root=True):
         """ Simulate mounting an ISO on the MS by copying an image directory
@@ -210,39 +216,15 @@ class Story9532(GenericTest):
         ./9532_9659_isos/
         They will be named "iso_dir_<iso_id>
         e.g.  .../core/9532_9659_isos/iso_dir_01/
+
+        The image is only copied if the MS does not already hold an
+        unpacked copy with the same content, see
+        fixture_utils.stage_fixture_dir().
         """
-        iso_dir = "iso_dir_{0}".format(iso_id)
-        tar_filename = iso_dir + ".gz.tar"
-        iso_local_path = os.path.join(os.path.dirname(__file__),
-                "9532_9659_isos/")
-        local_tar_file = iso_local_path + tar_filename
-
-        self.create_dir_on_node(self.ms_node, self.iso_remote_path)
-
-        # 1. Tar up local directory
-        tar_cmd = self.rhcmd.get_tar_cmd("czvf", local_tar_file, iso_dir)
-        cmd = "cd {0} ; ".format(iso_local_path) + tar_cmd
-        self.run_command_local(cmd)
-
-        # 2. Copy tar file to MS
-        self.copy_file_to(self.ms_node,
-                          local_tar_file,
-                          self.iso_remote_path,
-                          root_copy=as_root)
-
-        # 3. Untar the tar file in /tmp
-        dest_dir = "--directory={0}".format(self.iso_remote_path)
-        untar_cmd = self.rhcmd.get_tar_cmd("xmzvf",
-                                     self.iso_remote_path + tar_filename,
-                                     dest=dest_dir)
-
-        out, _, _ = self.run_command(self.ms_node, untar_cmd,
-                                     default_asserts=True)
-        self.assertNotEqual([], out)
-
-        # 4. Remove local tar files
-        cmd = "rm {0}".format(local_tar_file)
-        self.run_command_local(cmd)
+        iso_dir = os.path.join(os.path.dirname(__file__),
+                               "9532_9659_isos", "iso_dir_{0}".format(iso_id))
+        fixture_utils.stage_fixture_dir(self, self.ms_node, iso_dir,
+                                        self.iso_remote_path, as_root)
 
     def _litp_in_mmode(self):
         """ Determine if litp is in maintenance mode. """
@@ -254,31 +236,20 @@ class Story9532(GenericTest):
     def _backup_repos(self, repos=None):
         """ Backup the yum repositories. By default it backs up '3pp', 'litp" &
         'litp_plugins'. If a repo doen't exist it creates a directory:
-        '<reponame>_none' """
+        '<reponame>_none'
+
+        The backup is a hardlink snapshot of each repo, taken
+        for all repos at the same time, along with a manifest of their
+        files so _restore_repos() only has to undo the changes, see
+        repo_utils. """
         if repos is None:
             repos = ["3pp", "litp", "litp_plugins"]
 
         repo_paths = [os.path.join(self.repo_remote_path, repo)
                       for repo in repos]
-
-        for repo in repo_paths:
-            if self.remote_path_exists(self.ms_node, repo, expect_file=False):
-                cmds = ["/bin/mv {0} {0}_bak".format(repo),
-                        "/usr/bin/rsync -azH  {0}_bak/ {0}/".format(repo)]
-                for cmd in cmds:
-                    out, _, _ = self.run_command(self.ms_node,
-                                                          cmd,
-                                                          su_root=True,
-                                                          su_timeout_secs=600,
-                                                          default_asserts=True)
-                    self.assertEqual([], out)
-            else:
-                cmd = "/bin/mkdir {0}_none".format(repo)
-                out, _, _ = self.run_command(self.ms_node,
-                                                      cmd,
-                                                      su_root=True,
-                                                      default_asserts=True)
-                self.assertEqual([], out)
+        self.repo_manifests.update(
+            repo_utils.backup_repos(self, self.ms_node, repo_paths,
+                                    manifest=True))
 
     def _restore_repos(self, repos=None):
         """ Restore the repos that were backed up by _backup_repos(). """
@@ -287,50 +258,41 @@ class Story9532(GenericTest):
 
         repo_paths = [os.path.join(self.repo_remote_path, repo)
                       for repo in repos]
-
+        repo_utils.restore_repos(self, self.ms_node, repo_paths,
+                                 self.repo_manifests)
         for repo in repo_paths:
-            if self.remote_path_exists(self.ms_node, "{0}_bak".format(repo),
-                                       expect_file=False):
-                cmds = ["/bin/rm -rf {0}".format(repo),
-                        "/bin/mv {0}_bak/ {0}/".format(repo)]
-                for cmd in cmds:
-                    self.run_command(self.ms_node,
-                                     cmd,
-                                     su_root=True)
-            elif self.remote_path_exists(self.ms_node, "{0}_none"
-                                         .format(repo),
-                                         expect_file=False):
-                cmds = ["/bin/rm -rf {0}".format(repo),
-                        "/bin/rmdir {0}_none".format(repo)]
-                for cmd in cmds:
-                    self.run_command(self.ms_node,
-                                     cmd,
-                                     su_root=True)
-
-    def _create_my_repo(self, repo_dir):
-        """
-        Function which creates a test repo to be used for these tests
-        """
-        self.rhc.get_createrepo_cmd(repo_dir, update=False)
-        self.run_command(
-            self.ms_node, "createrepo {0}".format(repo_dir), su_root=True)
-        self._check_yum_repo_is_present(repo_dir)
+            self.repo_manifests.pop(repo, None)
 
-    def _check_yum_repo_is_present(self, repo_path):
+    def _create_my_repos(self, repo_dirs):
         """
-        Check that file /repodata/repomd.xml file exist under repo folder
+        Function which creates test repos to be used for these tests, all
+        at the same time in one remote command, and checks that they all
+        have their repodata/repomd.xml
         """
-        repmod_path = repo_path + '/repodata/repomd.xml'
-        self.assertTrue(self.remote_path_exists(self.ms_node, repmod_path),
-            '<{0}> not found'.format(repmod_path))
+        repo_utils.create_repos(self, self.ms_node, repo_dirs)
 
-    def _install_test_rpms(self, nodes, rpms):
-        """ Install rpm packages on a nodes. """
+    def _install_test_rpms(self, nodes, rpms, parallel=True):
+        """ Install rpm packages on a nodes. If parallel is True all nodes
+        are installed at the same time and every failed node is reported.
+        """
         rpm_local_dir = os.path.join(os.path.dirname(__file__),
             "9532_9659_rpms")
-        for node in nodes:
-            self.assertTrue(self.copy_and_install_rpms(node,
-                [os.path.join(rpm_local_dir, rpm) for rpm in rpms], "/tmp"))
+        rpm_paths = [os.path.join(rpm_local_dir, rpm) for rpm in rpms]
+
+        def install_on_node(node):
+            """ Copy and install the rpms on a node. """
+            self.assertTrue(self.copy_and_install_rpms(node, rpm_paths,
+                                                       "/tmp"))
+
+        if not parallel:
+            for node in nodes:
+                install_on_node(node)
+            return
+
+        _, errors = package_utils.run_on_nodes(install_on_node, nodes)
+        self.assertEqual({}, errors,
+                         "Failed to install test rpms:\n{0}"
+                         .format(package_utils.format_node_errors(errors)))
 
     def _uninstall_test_rpms(self, nodes, test_pkgs):
         """ Uninstall rpm packages from nodes. """
@@ -385,35 +347,11 @@ class Story9532(GenericTest):
             2. Update the yum repository.
             3. Clean the yum cache so queries will use actual repo contents.
             4. Uninstall test packages
+        Errors are ignored, see package_utils.cleanup_test_repo().
         """
-        all_nodes = nodes + [self.ms_node]
-
-        # 1. Remove RPMs from the yum repository on MS.
-        for rpm in rpm_list:
-            self.log("info", "Removing: {0} from the repo: {1}"
-                     .format(rpm, repo_path))
-            repo_to_rm = repo_path + '/' + rpm
-            self.remove_item(self.ms_node,
-                             repo_to_rm,
-                             su_root=True)
-
-        # 2. Update the yum repository.
-        cmd = "/usr/bin/createrepo --update " + repo_path
-        self.run_command(self.ms_node,
-                         cmd,
-                         su_root=True,
-                         su_timeout_secs=120)
-
-        # 3. Clean the yum cache.
-        cmd = self.rhcmd.get_yum_cmd("clean all")
-        for node in all_nodes:
-            self.run_command(node, cmd, su_root=True)
-
-        # 4. Uninstall test packages
-        for node in nodes:
-            for package in self.test_pkgs:
-                cmd = "/bin/rpm -e " + package
-                self.run_command(node, cmd, su_root=True)
+        package_utils.cleanup_test_repo(self, self.ms_node, nodes, rpm_list,
+                                        repo_path, self.test_pkgs,
+                                        strict=False)
 
     def _add_upg_item(self, item):
         """ Add an upgrade item at a path. """
@@ -427,8 +365,10 @@ class Story9532(GenericTest):
 
     def _remove_upgrade_items_from_model(self, nodes, run_plan=True):
         """Remove an upgrade item from a node"""
+        upg_states = self._get_upgrade_states()
+        plan_needed = False
         for node in nodes:
-            upg_state = self._get_nodes_upgrade_state(node)
+            upg_state = upg_states.get(node, False)
 
             node_url = self.get_node_url_from_filename(self.ms_node, node)
             upg_url = node_url + "/upgrade"
@@ -437,75 +377,44 @@ class Story9532(GenericTest):
             if upg_state in ["Updated", "Applied", "ForRemoval"]:
                 self.log("info", "Removing upgrade in {0} state."
                          .format(upg_state))
+                plan_needed = True
 
-                if run_plan:
-                    # Run 'litp create_plan'.
-                    cmd_create = self.cli.get_create_plan_cmd()
-                    self.run_command(self.ms_node, cmd_create)
+        # A single plan removes the upgrade items of all nodes.
+        if plan_needed and run_plan:
+            # Run 'litp create_plan'.
+            cmd_create = self.cli.get_create_plan_cmd()
+            self.run_command(self.ms_node, cmd_create)
 
-                    # Run 'litp run_plan'.
-                    cmd_run = self.cli.get_run_plan_cmd()
-                    self.run_command(self.ms_node, cmd_run)
+            # Run 'litp run_plan'.
+            cmd_run = self.cli.get_run_plan_cmd()
+            self.run_command(self.ms_node, cmd_run)
 
-                    # 10. Verify that the plan completes.
-                    self.wait_for_plan_state(self.ms_node,
-                        test_constants.PLAN_COMPLETE, self.plan_timeout_mins)
+            # 10. Verify that the plan completes.
+            self.wait_for_plan_state(self.ms_node,
+                test_constants.PLAN_COMPLETE, self.plan_timeout_mins)
 
-    def _get_nodes_upgrade_state(self, node):
-        """ Get the state of a node's upgrade item.
-            Returns False if upgrade doesn't exist
+    def _get_upgrade_states(self):
+        """ Get the state of the upgrade item of every node, keyed by node.
+            Nodes without an upgrade item are left out.
         """
-        upg_url = self.get_node_url_from_filename(self.ms_node, node) \
-            + "/upgrade"
-
-        # Get a cmd which finds the 'state' value of the returned ip range path
-        get_data_cmd = self.cli.get_show_data_value_cmd(upg_url,
-                                                    "state")
-        # Now we run the passed command, the state value is output to stdout
-        stdout, _, _ = self.run_command(self.ms_node, get_data_cmd)
-        if stdout:
-            return stdout[0]
-        else:
-            return False
+        return package_utils.get_upgrade_states(self, self.ms_node)
 
-    def _node_rebooted(self, node):
+    def _nodes_rebooted(self, nodes, boot_ids, pool=None):
         """
-            Verify that a node  has rebooted.
+            Verify that nodes have rebooted, i.e. that their boot id is no
+            longer the one read before the plan was run. All nodes are
+            watched at the same time, through the NodeConnectionPool pool
+            if given.
+
+            Returns a dict with the RebootTimeline of each node.
         """
-        node_restarted = False
-        max_duration = 400
-        elapsed_sec = 0
-        cmd = self.rhcmd.get_cat_cmd('/proc/uptime')
-        while elapsed_sec < max_duration:
-            try:
-                out, _, _ = self.run_command(node, cmd,
-                                                  su_root=True,
-                                                  default_asserts=True)
-                self.assertNotEqual([], out)
-                uptime_seconds = float(out[0].split()[0])
-                self.log("info", "{0} is up for {1} seconds"
-                         .format(node, str(uptime_seconds)))
-
-                if uptime_seconds < 180.0:
-                    self.log("info", "{0} has been rebooted"
-                             .format(node))
-                    node_restarted = True
-                    break
-            except (socket.error, exceptions.AssertionError):
-                self.log("info", "{0} is not up at the moment"
-                         .format(node))
-            except:
-                self.log("error", "Reboot check. Unexpected Exception: {0}"
-                         .format(sys.exc_info()[0]))
-                self.disconnect_all_nodes()
-
-            sleep(10)
-            elapsed_sec += 10
-
-        if not node_restarted:
-            self.log("error", "{0} not rebooted in last {1} seconds."
-                     .format(node, str(max_duration)))
-        return node_restarted
+        timelines = node_utils.wait_for_reboot(self, nodes, boot_ids,
+                                               pool=pool)
+        for node in nodes:
+            if not timelines[node].rebooted:
+                self.log("error", "{0} not rebooted: {1}"
+                         .format(node, timelines[node]))
+        return timelines
 
     def _import_rpms(self, rpms, repo=test_constants.OS_UPDATES_PATH_RHEL7):
         """
@@ -515,47 +424,18 @@ class Story9532(GenericTest):
             is installed so we support with and without kernel packages.
         Actions:
             1. Select RPM packages to upgrade.
-            2. Create a directory for rpms
-            3. Copy RPMs into /tmp on the MS.
-            4. Import RPMs with LITP import cmd into update repo.
+            2. Copy RPMs into a staging directory on the MS.
+            3. Import the directory with LITP import cmd into update repo.
+            See package_utils.import_rpms().
         """
-        rpms_local_paths = []
-        rpms_remote_paths = []
-        rpm_remote_dir = '/tmp/story9532_9659'
-        dir_to_import = rpm_remote_dir + "/rpm_to_import"
-        rpm_local_dir = "9532_9659_rpms/"
-        for rpm in rpms:
-            rpms_local_paths.append(os.path.join(os.path.dirname(__file__),
-                                                 rpm_local_dir + rpm)
-                                    )
-
-            rpms_remote_paths.append(os.path.join(dir_to_import,
-                                                  rpm)
-                                     )
-
         # 1. Select RPM packages to upgrade.
-        local_file_paths = rpms_local_paths
-
-        # 2. Create a directory for rpms to import. If it exists, remove it and
-        # create it again
-        self.create_dir_on_node(self.ms_node, rpm_remote_dir)
-        if self.remote_path_exists(self.ms_node,
-                                   dir_to_import,
-                                   expect_file=False):
-            self.assertTrue(self.remove_item(self.ms_node, dir_to_import))
-
-        self.create_dir_on_node(self.ms_node, dir_to_import)
-
-        # 3. Copy RPMs into /tmp on the ms
-        for loc_path in local_file_paths:
-            self.assertTrue(self.copy_file_to(self.ms_node,
-                                              loc_path,
-                                              dir_to_import))
+        rpm_local_dir = os.path.join(os.path.dirname(__file__),
+                                     "9532_9659_rpms")
+        local_file_paths = [os.path.join(rpm_local_dir, rpm) for rpm in rpms]
 
-        # 4. Import them with LITP import cmd into update repo
-        self.execute_cli_import_cmd(self.ms_node,
-                                    dir_to_import,
-                                    repo)
+        # 2. & 3. Copy and import them
+        package_utils.import_rpms(self, self.ms_node, local_file_paths, repo,
+                                  '/tmp/story9532_9659/rpm_to_import')
 
     def _set_litp_mmode(self, enable=True):
         """ Set the maintenance mode of litp. Defaults to enabling it. """
@@ -619,9 +499,8 @@ class Story9532(GenericTest):
 
             self.log("info", "5. Run create_repo command for each repo dir")
 
-            for repo_name in new_repos:
-                self._create_my_repo(self.repo_remote_path +
-                                     repo_name)
+            self._create_my_repos([self.repo_remote_path + repo_name
+                                    for repo_name in new_repos])
 
             self.log("info", "5.5 Remove all /upgrade items")
             try:
@@ -677,19 +556,46 @@ class Story9532(GenericTest):
             self.log("info", "12. Run 'litp create_plan'.")
             self.execute_cli_createplan_cmd(self.ms_node)
 
+            # Watch every node the plan upgrades, not only the modeled one.
+            plan = plan_utils.get_plan(self, self.ms_node)
+            upgraded_nodes = [
+                node for node in self.mn_nodes
+                if any("Update packages" in task.description
+                       for task in plan.tasks_for_hostname(
+                           self.get_node_hostname(self.ms_node, node)))]
+            if reboot_expected:
+                boot_ids = node_utils.get_boot_ids(self, upgraded_nodes)
+
             self.log("info", "13. Run 'litp run_plan'.")
             self.execute_cli_runplan_cmd(self.ms_node)
+            # Read the plan once now so that the tasks which end during
+            # the reboot are timed from here.
+            monitor = plan_utils.PlanMonitor(self, self.ms_node)
+            monitor.poll()
 
             if reboot_expected:
-                # Dis/reconnect to nodes. MNs may have been rebooted.
-                self.disconnect_all_nodes()
-
+                # The watch reconnects to the rebooted nodes at the same
+                # time, see node_utils.NodeConnectionPool.
                 self.log("info", "14. Verify that managed node has rebooted.")
-                self.assertTrue(self._node_rebooted(upg_node))
+                # Keep timing the plan tasks during the reboot.
+                pool = node_utils.NodeConnectionPool(self)
+                monitor.follow(pool)
+                try:
+                    timelines = self._nodes_rebooted(upgraded_nodes,
+                                                     boot_ids, pool)
+                finally:
+                    monitor.stop()
+                for node in upgraded_nodes:
+                    self.assertTrue(timelines[node].rebooted,
+                                    str(timelines[node]))
 
             self.log("info", "15. Verify that the plan is successful.")
-            self.assertTrue(self.wait_for_plan_state(self.ms_node,
-                test_constants.PLAN_COMPLETE, self.plan_timeout_mins))
+            self.assertTrue(monitor.wait(test_constants.PLAN_COMPLETE,
+                                         self.plan_timeout_mins))
+            for task_desc in ["Update packages on node", "Reboot node"]:
+                for description, duration in monitor.durations(task_desc):
+                    self.log("info", "'{0}' took {1:.1f} seconds"
+                             .format(description, duration))
 
             self.log("info", "16. Verify packages updated on modeled node")
             self._verify_packages_upgraded(upg_node, upg_rpms)
@@ -700,7 +606,7 @@ class Story9532(GenericTest):
 
             self.log("info", "Verify that the upgrade is Applied")
             self.assertEqual("Applied",
-                        self._get_nodes_upgrade_state(upg_node))
+                        self._get_upgrade_states().get(upg_node))
         finally:
             self._set_litp_mmode(False)
             self.log("info", "18. Remove the upgrade item from model.")
@@ -714,24 +620,22 @@ class Story9532(GenericTest):
                                 upg_rpms,
                                 test_constants.OS_UPDATES_PATH_RHEL7)
 
-    def _verify_update_task(self, node):
+    def _verify_update_task(self, node, plan):
         """
         for a plan in initial state, this function verifies that there is only
         one update task for the node
         """
-        tasks = self.get_plan_task_states(self.ms_node,
-                test_constants.PLAN_TASKS_INITIAL)
-        self.assertNotEqual([], tasks)
+        self.assertNotEqual(0, len(plan))
 
+        hostname = self.get_node_hostname(self.ms_node, node)
         node_url = self.get_node_url_from_filename(self.ms_node, node)
-        single_update_task = {'PATH': '{0}/upgrade'.format(node_url),
-                'MESSAGE': 'Update packages on node "{0}"'.format(node)}
-        self.assertTrue(single_update_task in tasks)
-
-        for (path, message) in tasks:
-            if node_url in path:
-                # task affects the node, verify that there is no update task
-                self.assertFalse("Update package " in message)
+        update_tasks = [task for task in plan.tasks_for_hostname(hostname)
+                        if "Update package" in task.description]
+        self.assertEqual(1, len(update_tasks), update_tasks)
+        self.assertEqual('{0}/upgrade'.format(node_url),
+                         update_tasks[0].path)
+        self.assertEqual('Update packages on node "{0}"'.format(hostname),
+                         update_tasks[0].description)
 
     @attr('all', 'revert', 'story9532_9659', 'story9532_9659_tc1')
     def test_01_p_upgrade_modeled_repos_on_inherited_nodes(self):
@@ -845,9 +749,8 @@ class Story9532(GenericTest):
                 self.assertEqual([], out)
 
             # 4. Run createrepo command for test repo.
-            for repo_name in repo_names:
-                self._create_my_repo(self.repo_remote_path +
-                                     repo_name)
+            self._create_my_repos([self.repo_remote_path + repo_name
+                                    for repo_name in repo_names])
 
             # 5. Create yum repo in LITP model.
             for repo_name in repo_names:
@@ -915,13 +818,12 @@ class Story9532(GenericTest):
                                                              "upgrade"))
                 self.run_command(self.ms_node, cmd_remove_inherit)
 
-            # 15. Run 'rm -rf' to remove test repos.
-            for repo_name in repo_names:
-                cmd = "/bin/rm -rf {0}{1}".format(
-                    self.repo_remote_path, repo_name)
-                self.run_command(self.ms_node,
-                                 cmd,
-                                 su_root=True)
+            # 15. Run 'rm -rf' to remove test repos, in a single exec.
+            cmd_utils.run_pipelined(
+                self, self.ms_node,
+                ["/bin/rm -rf {0}{1}".format(self.repo_remote_path, repo_name)
+                 for repo_name in repo_names],
+                su_root=True)
             # Remove repo files
             all_nodes = self.mn_nodes + [self.ms_node]
             for repo in repo_names:
@@ -1077,9 +979,8 @@ class Story9532(GenericTest):
 
             self.log("info", "5. Run create_repo command for each repo dir")
 
-            for repo_name in new_repos_step[0]:
-                self._create_my_repo(self.repo_remote_path +
-                                     repo_name)
+            self._create_my_repos([self.repo_remote_path + repo_name
+                                    for repo_name in new_repos_step[0]])
 
             self.log("info", "6. Create yum repo in LITP model for each repo")
             yum_repo_urls = list()
@@ -1203,6 +1104,7 @@ class Story9532(GenericTest):
 
         nodes = self.mn_nodes
         node_to_fail = nodes[0]
+        log_cursor = LogCursor(self, self.ms_node)
 
         try:
 
@@ -1250,8 +1152,10 @@ class Story9532(GenericTest):
 
             self.log("info", "10. Verify error in logs")
             hostname = self.get_node_att(node_to_fail, "hostname")
-            self.assertTrue(self.wait_for_log_msg(self.ms_node,
-                '{0} failed with message: Dummy yum failure'.format(hostname)))
+            result = log_cursor.wait_for_all(
+                ['{0} failed with message: Dummy yum failure'
+                 .format(hostname)])
+            self.assertTrue(result.success, str(result))
 
             self.log("info", "11. Verify that the plan fails in update task")
             self.assertTrue(self.wait_for_plan_state(self.ms_node,
@@ -1266,20 +1170,12 @@ class Story9532(GenericTest):
                 "12. Verify that the upgrade item is in Updated state")
             self.assertEqual("Updated "
                              "(deployment of properties indeterminable)",
-                             self._get_nodes_upgrade_state(node_to_fail))
+                             self._get_upgrade_states().get(node_to_fail))
 
             self.log("info", "13. Create plan and check for update task")
             self.execute_cli_createplan_cmd(self.ms_node)
-            plan, _, _ = self.execute_cli_showplan_cmd(self.ms_node)
-            plan_dict = self.cli.parse_plan_output(plan)
-
-            task_found = False
-            for phase in plan_dict.itervalues():
-                for task in phase.itervalues():
-                    if self.is_text_in_list(failed_task_message,
-                                            task['DESC']):
-                        task_found = True
-            self.assertTrue(task_found)
+            plan = plan_utils.get_plan(self, self.ms_node)
+            self.assertTrue(plan.has_task(failed_task_message))
 
         finally:
             self.log("info", "14. Restore yum")
@@ -1380,17 +1276,8 @@ class Story9532(GenericTest):
 
             self.log("info", "8. Create plan and check for reboot task")
             self.execute_cli_createplan_cmd(self.ms_node)
-            plan, _, _ = self.execute_cli_showplan_cmd(self.ms_node)
-            plan_dict = self.cli.parse_plan_output(plan)
-
-            task_found = False
-            reboot_message = "Reboot node"
-            for phase in plan_dict.itervalues():
-                for task in phase.itervalues():
-                    if self.is_text_in_list(reboot_message,
-                                            task['DESC']):
-                        task_found = True
-            self.assertFalse(task_found)
+            plan = plan_utils.get_plan(self, self.ms_node)
+            self.assertFalse(plan.has_task("Reboot node"))
 
         finally:
             self.log("info", "13. Restore repo")
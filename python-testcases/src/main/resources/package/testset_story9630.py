@@ -15,9 +15,13 @@ program(s) have been supplied.
 from litp_generic_test import GenericTest, attr
 import test_constants
 from redhat_cmd_utils import RHCmdUtils
+from package_utils import PackageInventoryMixin, ModelCacheMixin
+from plan_utils import PlanMonitorMixin
+import node_utils
 
 
-class Story9630(GenericTest):
+class Story9630(PackageInventoryMixin, ModelCacheMixin,
+                PlanMonitorMixin, GenericTest):
     """
     As an ENM user I want a FOSS rsyslog 8.4.1 (or later) installed
     so I use elasticsearch in my 15B deployment.
@@ -74,22 +78,18 @@ class Story9630(GenericTest):
                                 positive=True):
         """
         Checks that the EXTRrsyslog package has been installed
-        successfully and that the service is running.
+        successfully and that the service is running. Both are read in a
+        single round trip to the node, see node_utils.query_node().
         """
         if not pkg:
             pkg = self.RSYSLOG_PKG_NAME
-        found = self.check_pkgs_installed(node, [pkg])
-        if positive:
-            self.assertTrue(found)
-        else:
-            self.assertFalse(found)
-        stdout, stderr, returnc = \
-            self.get_service_status(node, service_name,
-                                    assert_running=positive)
-        if not positive:
-            self.assertNotEqual([], stdout)
-            self.assertEqual([], stderr)
-            self.assertNotEqual(0, returnc)
+        installed, state = node_utils.query_node(self, node, [
+            {"query": "pkgs_installed", "packages": [pkg]},
+            {"query": "service_status", "service": service_name}])
+        self.assertEqual(positive, installed[pkg])
+        self.assertEqual(positive, state == "active",
+                         "{0} is {1} on {2}".format(service_name, state,
+                                                    node))
 
     def replaces_property_validation(self):
         """
@@ -225,15 +225,11 @@ class Story9630(GenericTest):
         self.wait_for_plan_state(self.ms_node, test_constants.PLAN_COMPLETE)
 
         self.log('info', "3.  Check that EXTRlitprsyslog package is installed "
-                         "successfully.")
+                         "successfully and that the rsyslog process "
+                         "auto-start per nodes is active")
         for node in self.all_nodes:
-            self.chk_pkg_and_srvc_status(node)
-
-            self.log('info', "Check that the rsyslog process auto-start per "
-                             "nodes is active")
-            stdout, _, _ = self.get_service_status(node,
-                                                self.RSYSLOG_REPLACE_PGK_NAME)
-            self.assertTrue(self.is_text_in_list("active", stdout))
+            self.chk_pkg_and_srvc_status(
+                node, service_name=self.RSYSLOG_REPLACE_PGK_NAME)
 
         self.log('info', "4. Verify that the 'replaces' package property is "
                          "readonly.")